@@ -2,11 +2,16 @@
 import streamlit as st
 import pyaudio
 import wave
-import speech_recognition as sr
 import tempfile
+import time
 
-from backend.rag import answer_query_with_cache
+from backend.rag import answer_query_with_cache, init_answer_store, stream_answer_with_cache
 from backend.digital_twin import PatientDigitalTwin
+from backend.stt import get_stt_backend, TranscriptionError
+from backend.tts import SpeechSession
+from backend.conversation import ConversationMemory
+from backend.sharding import available_topics
+from backend import profiling
 
 
 # ---------------------------------------------------------
@@ -16,6 +21,10 @@ st.set_page_config(page_title="AI Medical Chatbot", page_icon="🧠", layout="wi
 st.title("🧠 AI Medical Chatbot (Voice + RAG + Digital Twin)")
 
 
+# precomputed answers + their refresher, once per process (no-op on reruns)
+init_answer_store()
+
+
 # ---------------------------------------------------------
 # SESSION STATE
 # ---------------------------------------------------------
@@ -25,6 +34,10 @@ if "twin" not in st.session_state:
 if "history" not in st.session_state:
     st.session_state.history = []
 
+# bounded history used for follow-up questions (history above is display-only)
+if "memory" not in st.session_state:
+    st.session_state.memory = ConversationMemory()
+
 if "voice_mode" not in st.session_state:
     st.session_state.voice_mode = False
 
@@ -46,6 +59,22 @@ if st.sidebar.button("🔄 Refresh Vitals"):
     st.session_state.twin.update_vitals()
     st.rerun()
 
+st.sidebar.header("📂 Knowledge Base")
+topic = st.sidebar.selectbox("Search topic", ["All topics"] + available_topics())
+where = None if topic == "All topics" else {"topic": topic}
+
+st.sidebar.header("🔊 Voice Output")
+speak_answers = st.sidebar.checkbox("Speak answers aloud", value=False)
+
+# process-wide: applies to every session served by this app
+with st.sidebar.expander("🛠 Admin"):
+    profile_slow = st.checkbox("Profile slow requests", value=profiling.is_enabled())
+    profile_threshold = st.number_input("Slow request threshold (ms)", min_value=0,
+                                        value=int(profiling.threshold_ms()), step=250)
+    profiling.set_enabled(profile_slow, threshold_ms=profile_threshold)
+    if profile_slow:
+        st.caption(f"Flame graphs are written to `{profiling.PROFILE_DIR}`")
+
 
 # ---------------------------------------------------------
 # VOICE RECORDING FUNCTION
@@ -98,16 +127,12 @@ if st.button("Record Voice"):
     with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
         audio_file = record_audio(duration=5, filename=tmp.name)
 
-        recognizer = sr.Recognizer()
-        with sr.AudioFile(audio_file) as source:
-            audio_data = recognizer.record(source)
-
         try:
-            text = recognizer.recognize_google(audio_data)
+            text = get_stt_backend().transcribe(audio_file)
             st.success(f"🗣 You said: {text}")
             user_query = text
-        except:
-            st.warning("Could not understand the voice.")
+        except TranscriptionError as e:
+            st.warning(str(e))
 
 
 # ---------------------------------------------------------
@@ -123,15 +148,46 @@ response = None  # Initialize safely
 
 if st.button("Ask"):
     if user_query.strip():
-        with st.spinner("🔍 Retrieving medical context and generating answer..."):
-            response = answer_query_with_cache(
-                query=user_query,
-                k=3,
-                ttl_seconds=3600,
-                include_vitals=vitals_short,
-            )
+        if speak_answers:
+            # stream the answer and start speaking at the first complete sentence
+            started_at = time.perf_counter()
+            with st.spinner("🔍 Retrieving medical context..."):
+                result = stream_answer_with_cache(
+                    query=user_query,
+                    k=3,  # adaptive: fewer chunks for close matches, more when scores are flat
+                    ttl_seconds=3600,
+                    include_vitals=vitals_short,
+                    memory=st.session_state.memory,
+                    where=where,
+                    adaptive=True,
+                )
+            speech = SpeechSession(answer=result.get("answer"), started_at=started_at)
+            answer = st.write_stream(speech.wrap(result["stream"]))
+            if speech.error is not None:
+                st.warning(f"🔇 Could not speak the answer: {speech.error}")
+            elif speech.first_audio_s is not None:
+                st.caption(f"🔊 First audio after {speech.first_audio_s:.2f}s")
+            response = {"answer": answer, "sources": result["sources"], "cached": result["cached"],
+                        "precomputed": result.get("precomputed", False), "query": result["query"],
+                        "retrieval": result.get("retrieval")}
+        else:
+            with st.spinner("🔍 Retrieving medical context and generating answer..."):
+                response = answer_query_with_cache(
+                    query=user_query,
+                    k=3,  # adaptive: fewer chunks for close matches, more when scores are flat
+                    ttl_seconds=3600,
+                    include_vitals=vitals_short,
+                    memory=st.session_state.memory,
+                    where=where,
+                    adaptive=True,
+                )
+
+        if response["query"] != user_query:
+            st.caption(f"🔎 Searched for: {response['query']}")
 
         # Store messages
+        st.session_state.memory.add_turn("user", user_query)
+        st.session_state.memory.add_turn("assistant", response["answer"])
         st.session_state.history.append(("You", user_query))
         st.session_state.history.append(("Bot", response["answer"]))
 
@@ -163,10 +219,17 @@ if st.session_state.history:
             else:
                 st.markdown(f"- {src}")
 
-        if response.get("cached"):
+        retrieval = response.get("retrieval") or {}
+        if retrieval.get("reason") == "no_match":
+            st.warning("🚫 Nothing relevant in the knowledge base — no answer generated")
+        elif response.get("precomputed"):
+            st.success("📌 Precomputed Answer")
+        elif response.get("cached"):
             st.success("⚡ Cached Answer")
         else:
             st.info("✨ Fresh Answer")
+        if retrieval.get("k"):
+            st.caption(f"📎 {retrieval['k']} chunk(s) used ({retrieval['reason']})")
 
 
 # ---------------------------------------------------------
@@ -0,0 +1,70 @@
+# backend/adaptive.py
+"""
+Adaptive number of retrieved chunks, chosen from the distance distribution of the candidates.
+
+- no_match:  no candidate within RELEVANCE_MAX_DISTANCE -> skip the LLM, answer NO_MATCH_ANSWER
+- confident: top hit within CONFIDENT_DISTANCE -> keep only the hits close to it (fewer chunks)
+- flat:      the first k distances are within FLAT_SPREAD of each other (no clear winner)
+             -> widen to up to ADAPTIVE_K_MAX relevant candidates
+- default:   the relevant hits among the first k
+Distances are cosine distances (0 = identical), sorted ascending as returned by the vector index.
+"""
+import os
+from typing import List, Tuple
+
+ADAPTIVE_K_MIN = int(os.getenv("ADAPTIVE_K_MIN", "1"))
+ADAPTIVE_K_MAX = int(os.getenv("ADAPTIVE_K_MAX", "6"))  # candidates fetched per query
+RELEVANCE_MAX_DISTANCE = float(os.getenv("RELEVANCE_MAX_DISTANCE", "0.75"))
+CONFIDENT_DISTANCE = float(os.getenv("CONFIDENT_DISTANCE", "0.35"))
+CLOSE_MARGIN = float(os.getenv("CLOSE_MARGIN", "0.08"))  # confident: keep hits this close to the top one
+FLAT_SPREAD = float(os.getenv("FLAT_SPREAD", "0.03"))
+
+NO_MATCH_ANSWER = (
+    "I couldn't find information about this in my medical knowledge base, so I can't answer it reliably. "
+    "Please consult a doctor or another qualified healthcare professional. "
+    "If your symptoms are severe or getting worse, seek immediate medical care."
+)
+
+
+class AdaptivePolicy:
+    """
+    Decide how many of the retrieved candidates go into the prompt.
+    - k_max: candidates to fetch; the policy never keeps more than this
+    - max_distance: candidates further than this are treated as irrelevant
+    """
+
+    def __init__(self, k_min: int = ADAPTIVE_K_MIN, k_max: int = ADAPTIVE_K_MAX,
+                 max_distance: float = RELEVANCE_MAX_DISTANCE, confident_distance: float = CONFIDENT_DISTANCE,
+                 close_margin: float = CLOSE_MARGIN, flat_spread: float = FLAT_SPREAD):
+        self.k_min = k_min
+        self.k_max = k_max
+        self.max_distance = max_distance
+        self.confident_distance = confident_distance
+        self.close_margin = close_margin
+        self.flat_spread = flat_spread
+
+    def fetch_k(self, k: int) -> int:
+        return max(k, self.k_max)
+
+    def choose(self, distances: List[float], k: int) -> Tuple[int, str]:
+        """
+        Number of leading candidates to keep, and the reason (see module docstring).
+        k is raised to at least k_min (and 1): only "no_match" keeps nothing.
+        """
+        k = max(k, self.k_min, 1)
+        relevant = [d for d in distances[:self.fetch_k(k)] if d <= self.max_distance]
+        if not relevant:
+            return 0, "no_match"
+
+        top = relevant[0]
+        if top <= self.confident_distance:
+            close = sum(1 for d in relevant if d <= top + self.close_margin)
+            return min(max(close, self.k_min), k, len(relevant)), "confident"
+
+        if len(relevant) > k and relevant[k - 1] - top <= self.flat_spread:
+            return min(len(relevant), self.k_max), "flat"
+
+        return min(len(relevant), k), "default"
+
+
+adaptive_policy = AdaptivePolicy()
@@ -0,0 +1,148 @@
+# backend/admission.py
+"""
+Backpressure for the API: a bounded number of RAG calls run at once, a bounded number wait,
+the rest get 429.
+
+A slot is held until the work it admitted has really stopped:
+- run_in_thread(): the worker thread holds the slot until it returns, even if the client
+  already got a 504, so timed-out calls still count against MAX_CONCURRENCY
+- AdmittedStreamingResponse: the response holds the slot until it has been sent or abandoned
+  (client disconnect, send error), whether or not its body iterator ever started
+- iterate_in_thread(): a blocking iterator (the LLM stream) is advanced one next() per worker
+  thread, each waited on only until the request's deadline
+"""
+import asyncio
+import itertools
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Iterator, Set
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+
+class Admission:
+    """
+    Bounded concurrency with a bounded wait queue.
+    Requests beyond max_concurrency wait; requests beyond max_concurrency + max_queue get 429.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int):
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_concurrency + max_queue
+        self.pending = 0  # running + waiting
+        self._sem = asyncio.Semaphore(max_concurrency)
+
+    async def acquire(self) -> "AdmissionSlot":
+        if self.pending >= self.max_pending:
+            raise HTTPException(status_code=429, detail="Server is busy, retry later.",
+                                headers={"Retry-After": "1"})
+        self.pending += 1
+        try:
+            await self._sem.acquire()
+        except BaseException:
+            self.pending -= 1
+            raise
+        return AdmissionSlot(self)
+
+    def _release(self) -> None:
+        self._sem.release()
+        self.pending -= 1
+
+
+class AdmissionSlot:
+    """
+    One admitted request. Several holders (the request handler, its worker thread, its response)
+    can share it; it is given back once all of them have released it.
+    Releasing the same holder twice is a no-op.
+    """
+
+    def __init__(self, admission: Admission, holder: str = "request"):
+        self._admission = admission
+        self._holders: Set[str] = {holder}
+
+    @property
+    def released(self) -> bool:
+        return not self._holders
+
+    def hold(self, holder: str) -> None:
+        if self.released:
+            raise RuntimeError("slot already released")
+        self._holders.add(holder)
+
+    def release(self, holder: str = "request") -> None:
+        if holder not in self._holders:
+            return
+        self._holders.discard(holder)
+        if not self._holders:
+            self._admission._release()
+
+
+_worker_ids = itertools.count()
+_DONE = object()
+
+
+def run_in_thread(slot: AdmissionSlot, fn: Callable, *args, **kwargs) -> asyncio.Future:
+    """
+    Run fn in the threadpool while holding the slot. Await the result through asyncio.shield()
+    so a timeout gives up waiting without releasing the slot before the thread is done.
+    """
+    holder = f"worker-{next(_worker_ids)}"  # several threads of one request may overlap
+    slot.hold(holder)
+    task = asyncio.ensure_future(run_in_threadpool(fn, *args, **kwargs))
+
+    def _done(t: asyncio.Future) -> None:
+        if not t.cancelled():
+            t.exception()  # retrieved here if the caller stopped waiting
+        slot.release(holder)
+
+    task.add_done_callback(_done)
+    return task
+
+
+async def iterate_in_thread(slot: AdmissionSlot, iterator: Iterator[Any], deadline: float) -> AsyncIterator[Any]:
+    """
+    Iterate a blocking iterator from async code. Each next() runs in a worker thread and is waited
+    on until deadline (a time.monotonic() value); after that asyncio.TimeoutError is raised.
+    However the iteration ends, the iterator is closed as soon as no next() is running in it,
+    and the slot is held until then. Use it with contextlib.aclosing().
+    """
+    lock = threading.Lock()  # next() and close() never run in the iterator at the same time
+
+    def _next():
+        with lock:
+            return next(iterator, _DONE)
+
+    def _close():
+        with lock:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    try:
+        while True:
+            step = run_in_thread(slot, _next)
+            item = await asyncio.wait_for(asyncio.shield(step), timeout=max(0.0, deadline - time.monotonic()))
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        if slot.released:  # no next() can still be running
+            _close()
+        else:
+            run_in_thread(slot, _close)  # waits for a stalled next() to return first
+
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """StreamingResponse that releases its admission slot when the response is over, however it ended."""
+
+    def __init__(self, slot: AdmissionSlot, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.slot = slot
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.slot.release()
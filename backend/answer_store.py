@@ -0,0 +1,208 @@
+# backend/answer_store.py
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+ANSWER_STORE_PATH = os.getenv("ANSWER_STORE_PATH", "./answer_store.db")
+# written by scripts/ingest.py whenever the knowledge base changes
+KB_VERSION_PATH = os.getenv("KB_VERSION_PATH", "./chroma_db/kb_version")
+
+REFRESH_LEASE_S = float(os.getenv("ANSWER_STORE_REFRESH_LEASE_S", "1800"))  # a crashed refresher's claim expires
+
+
+# -------------------------------
+#   Keys
+# -------------------------------
+
+def normalize_query(query: str) -> str:
+    """
+    Lowercase, drop punctuation, collapse whitespace. This is the only lookup key: looser keys
+    (sorted content words, dropped fillers) map questions like "can I take ibuprofen...?" and
+    "should I take ibuprofen...?" to the same answer.
+    """
+    return " ".join(re.sub(r"[^\w\s]", " ", query.lower()).split())
+
+
+def context_fingerprint(context: str) -> str:
+    """Hash of the retrieved chunks an answer was generated from."""
+    return hashlib.sha256(context.encode("utf-8")).hexdigest()
+
+
+def kb_version() -> str:
+    try:
+        with open(KB_VERSION_PATH, encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return ""
+
+
+def bump_kb_version() -> str:
+    """Mark the knowledge base as changed (called at the end of ingestion)."""
+    version = str(time.time())
+    os.makedirs(os.path.dirname(KB_VERSION_PATH) or ".", exist_ok=True)
+    with open(KB_VERSION_PATH, "w", encoding="utf-8") as f:
+        f.write(version)
+    return version
+
+
+# -------------------------------
+#   Store
+# -------------------------------
+
+class AnswerStore:
+    """
+    Persistent store of precomputed answers (SQLite), mirrored in memory.
+    get() is one dict lookup on the normalized query — it never touches the database,
+    the embedder or Chroma.
+    """
+
+    def __init__(self, path: str = ANSWER_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS answers (
+                   key TEXT PRIMARY KEY,
+                   query TEXT NOT NULL,
+                   answer TEXT NOT NULL,
+                   sources TEXT NOT NULL,
+                   fingerprint TEXT NOT NULL,
+                   k INTEGER NOT NULL,
+                   updated_at REAL NOT NULL
+               )"""
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._db.commit()
+        self._by_key = {}  # normalized query -> entry
+        self._data_version = None
+        self.reload()
+
+    def reload(self) -> None:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, query, answer, sources, fingerprint, k, updated_at FROM answers"
+            ).fetchall()
+            self._data_version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        by_key = {}
+        for key, query, answer, sources, fingerprint, k, updated_at in rows:
+            by_key[key] = {"query": query, "answer": answer, "sources": json.loads(sources),
+                           "fingerprint": fingerprint, "k": k, "updated_at": updated_at}
+        with self._lock:
+            self._by_key = by_key
+
+    def changed_elsewhere(self) -> bool:
+        """True if another connection (another process) wrote to the database since the last reload()."""
+        with self._lock:
+            return self._db.execute("PRAGMA data_version").fetchone()[0] != self._data_version
+
+    def get(self, query: str) -> Optional[Dict[str, Any]]:
+        return self._by_key.get(normalize_query(query))
+
+    def put(self, query: str, answer: str, sources: List[Dict[str, Any]], fingerprint: str, k: int = 3) -> None:
+        key = normalize_query(query)
+        entry = {"query": query, "answer": answer, "sources": sources,
+                 "fingerprint": fingerprint, "k": k, "updated_at": time.time()}
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO answers (key, query, answer, sources, fingerprint, k, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, query, answer, json.dumps(sources, ensure_ascii=False), fingerprint, k, entry["updated_at"]),
+            )
+            self._db.commit()
+            self._by_key[key] = entry
+
+    def entries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._by_key.values())
+
+    def __len__(self) -> int:
+        return len(self._by_key)
+
+    def get_meta(self, name: str, default: str = "") -> str:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, name: str, value: str) -> None:
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (name, value))
+            self._db.commit()
+
+    def try_claim(self, name: str, owner: str, lease_s: float = REFRESH_LEASE_S) -> bool:
+        """
+        Compare-and-set a lease row in meta: True if owner now holds `name` (it was free, expired
+        or already ours). Processes sharing the database use it to elect a single refresher.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")  # take the write lock before reading the current holder
+            try:
+                row = self._db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+                if row:
+                    holder = json.loads(row[0])
+                    if holder["owner"] != owner and holder["expires"] > now:
+                        self._db.rollback()
+                        return False
+                self._db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                                 (name, json.dumps({"owner": owner, "expires": now + lease_s})))
+                self._db.commit()
+                return True
+            except BaseException:
+                self._db.rollback()
+                raise
+
+    def release_claim(self, name: str, owner: str) -> None:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+            if row and json.loads(row[0])["owner"] == owner:
+                self._db.execute("DELETE FROM meta WHERE name = ?", (name,))
+                self._db.commit()
+
+
+# -------------------------------
+#   Background refresh
+# -------------------------------
+
+def watch_kb_version(store: AnswerStore, refresh: Callable[[AnswerStore], int], interval_s: float = 60.0) -> threading.Thread:
+    """
+    Poll the knowledge-base version marker. When ingestion changed it, the one process that wins
+    the "refresh" claim runs refresh(store) (which regenerates entries whose chunks changed);
+    every other process sharing the database only reloads once the new answers are written.
+    """
+    owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+    def _refresh_if_stale() -> None:
+        version = kb_version()
+        if not version or version == store.get_meta("kb_version"):
+            return
+        if not store.try_claim("refresh", owner):
+            return  # another process is refreshing
+        try:
+            if version != store.get_meta("kb_version"):  # not finished by a refresher that just released
+                refresh(store)
+                store.set_meta("kb_version", version)
+        except Exception as e:
+            print(f"Answer store refresh failed: {e}")
+        finally:
+            store.release_claim("refresh", owner)
+
+    def _loop():
+        while True:
+            # any failure (e.g. "database is locked" while another worker writes) only skips this round
+            try:
+                _refresh_if_stale()
+                if store.changed_elsewhere():
+                    store.reload()
+            except Exception as e:
+                print(f"Answer store refresh check failed: {e}")
+            time.sleep(interval_s)
+
+    thread = threading.Thread(target=_loop, name="answer-store-refresh", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,198 @@
+# backend/api.py
+"""
+HTTP API for the RAG pipeline.
+
+Run one or more workers (each worker loads the embedder and Chroma once, at import):
+    uvicorn backend.api:app --host 0.0.0.0 --port 8000 --workers 4
+    python -m backend.api                  # same, configured by API_* env vars
+"""
+import asyncio
+import json
+import os
+import time
+from contextlib import aclosing, asynccontextmanager
+from typing import Dict, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from pydantic import BaseModel, Field
+
+from backend import rag
+from backend.admission import Admission, AdmittedStreamingResponse, iterate_in_thread, run_in_thread
+from backend.cache_singleton import cache
+from backend.digital_twin import PatientDigitalTwin
+from backend.metrics import RequestMetrics
+
+# -------------------------------
+#   Config
+# -------------------------------
+API_HOST = os.getenv("API_HOST", "0.0.0.0")
+API_PORT = int(os.getenv("API_PORT", "8000"))
+API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+REQUEST_TIMEOUT_S = float(os.getenv("API_REQUEST_TIMEOUT_S", "30"))
+MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", "8"))  # RAG calls running at once, per worker
+MAX_QUEUE = int(os.getenv("API_MAX_QUEUE", "32"))  # requests allowed to wait for a slot, per worker
+MAX_K = int(os.getenv("API_MAX_K", "20"))  # most chunks a request may ask for
+
+
+class AskRequest(BaseModel):
+    query: str
+    k: int = Field(3, ge=1, le=MAX_K)
+    ttl_seconds: int = Field(3600, ge=0)
+    patient: Optional[str] = None  # include this patient's vitals in the prompt
+    topic: Optional[str] = None  # restrict retrieval to one topic (metadata pre-filter)
+    adaptive: bool = False  # choose the number of chunks from their distances; skip the LLM when none match
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    rag.init_answer_store()  # each worker opens the store; one of them refreshes it after ingestion
+    yield
+
+
+app = FastAPI(title="AI Medical Chatbot API", lifespan=lifespan)
+admission = Admission(MAX_CONCURRENCY, MAX_QUEUE)
+metrics = RequestMetrics()
+twins: Dict[str, PatientDigitalTwin] = {}
+
+
+def get_twin(patient: str) -> PatientDigitalTwin:
+    if patient not in twins:
+        twins[patient] = PatientDigitalTwin()
+    return twins[patient]
+
+
+def vitals_summary(patient: Optional[str]) -> str:
+    if not patient:
+        return ""
+    v = get_twin(patient).get_vitals()
+    return (
+        f"HR={v['heart_rate']}, Temp={v['temperature']}F, "
+        f"BP={v['blood_pressure']}, RR={v['respiration_rate']}, "
+        f"SpO2={v['oxygen_saturation']}"
+    )
+
+
+def sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    """Latency is measured until the body has been sent, so streamed answers count in full."""
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    path = route.path if route is not None else request.url.path
+    body = response.body_iterator
+
+    async def timed_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            metrics.record(path, response.status_code, time.perf_counter() - start)
+
+    response.body_iterator = timed_body()
+    return response
+
+
+# -------------------------------
+#   Routes
+# -------------------------------
+
+@app.post("/ask")
+async def ask(req: AskRequest):
+    if not req.query.strip():
+        raise HTTPException(status_code=400, detail="Empty query.")
+
+    slot = await admission.acquire()
+    try:
+        # on timeout the client gets 504 now; the worker keeps the slot until its thread returns
+        work = run_in_thread(
+            slot,
+            rag.answer_query_with_cache,
+            query=req.query,
+            k=req.k,
+            ttl_seconds=req.ttl_seconds,
+            include_vitals=vitals_summary(req.patient),
+            where={"topic": req.topic} if req.topic else None,
+            adaptive=req.adaptive,
+        )
+        return await asyncio.wait_for(asyncio.shield(work), timeout=REQUEST_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Timed out generating the answer.")
+    finally:
+        slot.release()
+
+
+@app.post("/ask/stream")
+async def ask_stream(req: AskRequest):
+    """Server-sent events: one `meta` event, `delta` events with answer text, then `done` (or `error`)."""
+    if not req.query.strip():
+        raise HTTPException(status_code=400, detail="Empty query.")
+
+    slot = await admission.acquire()
+    deadline = time.monotonic() + REQUEST_TIMEOUT_S
+    try:
+        work = run_in_thread(
+            slot,
+            rag.stream_answer_with_cache,
+            query=req.query,
+            k=req.k,
+            ttl_seconds=req.ttl_seconds,
+            include_vitals=vitals_summary(req.patient),
+            where={"topic": req.topic} if req.topic else None,
+            adaptive=req.adaptive,
+        )
+        result = await asyncio.wait_for(asyncio.shield(work), timeout=REQUEST_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        slot.release()
+        raise HTTPException(status_code=504, detail="Timed out retrieving context.")
+    except BaseException:
+        slot.release()
+        raise
+
+    async def events():
+        yield sse("meta", {"sources": result["sources"], "cached": result["cached"],
+                           "retrieval": result.get("retrieval")})
+        # the deadline applies while waiting for each delta, so a stalled LLM stream still times out
+        try:
+            async with aclosing(iterate_in_thread(slot, result["stream"], deadline)) as deltas:
+                async for delta in deltas:
+                    yield sse("delta", {"text": delta})
+        except asyncio.TimeoutError:
+            yield sse("error", {"detail": "Timed out generating the answer."})
+            return
+        yield sse("done", {})
+
+    # the response owns the slot from here: released when it is sent or abandoned
+    return AdmittedStreamingResponse(slot, events(), media_type="text/event-stream",
+                                     headers={"Cache-Control": "no-cache"})
+
+
+@app.get("/vitals/{patient}")
+async def vitals(patient: str):
+    return {"patient": patient, "vitals": get_twin(patient).get_vitals()}
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", "pid": os.getpid(), "chunks": rag.collection.count()}
+
+
+@app.get("/metrics")
+async def get_metrics():
+    size, capacity = cache.info()
+    return {
+        "pid": os.getpid(),
+        "routes": metrics.snapshot(),
+        "admission": {"pending": admission.pending, "max_concurrency": admission.max_concurrency,
+                      "max_pending": admission.max_pending},
+        "cache": {"size": size, "capacity": capacity},
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run("backend.api:app", host=API_HOST, port=API_PORT, workers=API_WORKERS)
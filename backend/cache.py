@@ -1,3 +1,4 @@
+import threading
 import time
 from collections import OrderedDict
 from typing import Any, Optional, Tuple
@@ -6,7 +7,7 @@ from typing import Any, Optional, Tuple
 
 class LRUCacheTTL:
     """
-    Simple LRU cache with TTL per entry.
+    Simple LRU cache with TTL per entry. Thread-safe (the API serves requests on a threadpool).
     - capacity: max number of entries
     - default_ttl: seconds before an entry expires
     """
@@ -15,37 +16,42 @@ class LRUCacheTTL:
         self.capacity = capacity
         self.default_ttl = default_ttl
         self._store = OrderedDict()  # key -> (value, expiry_ts)
+        self._lock = threading.Lock()
 
     def _is_expired(self, expiry_ts: float) -> bool:
         return time.time() >= expiry_ts
 
     def get(self, key: str) -> Optional[Any]:
-        item = self._store.get(key)
-        if item is None:
-            return None
-        value, expiry_ts = item
-        if self._is_expired(expiry_ts):
-            # expired — remove and return None
-            del self._store[key]
-            return None
-        # move to end = most recently used
-        self._store.move_to_end(key)
-        return value
+        with self._lock:
+            item = self._store.get(key)
+            if item is None:
+                return None
+            value, expiry_ts = item
+            if self._is_expired(expiry_ts):
+                # expired — remove and return None
+                del self._store[key]
+                return None
+            # move to end = most recently used
+            self._store.move_to_end(key)
+            return value
 
     def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
         if ttl is None:
             ttl = self.default_ttl
         expiry_ts = time.time() + ttl
-        if key in self._store:
-            del self._store[key]
-        elif len(self._store) >= self.capacity:
-            # evict least recently used
-            self._store.popitem(last=False)
-        self._store[key] = (value, expiry_ts)
+        with self._lock:
+            if key in self._store:
+                del self._store[key]
+            elif len(self._store) >= self.capacity:
+                # evict least recently used
+                self._store.popitem(last=False)
+            self._store[key] = (value, expiry_ts)
 
     def clear(self) -> None:
-        self._store.clear()
+        with self._lock:
+            self._store.clear()
 
     def info(self) -> Tuple[int, int]:
         """Return (current_size, capacity)"""
-        return len(self._store), self.capacity
+        with self._lock:
+            return len(self._store), self.capacity
@@ -2,3 +2,6 @@ from backend.cache import LRUCacheTTL
 
 # default: keep 512 answers cached for 2 hours
 cache = LRUCacheTTL(capacity=512, default_ttl=2 * 60 * 60)
+
+# synthesized speech for answers, keyed by the same hash as the answer cache
+audio_cache = LRUCacheTTL(capacity=128, default_ttl=2 * 60 * 60)
@@ -0,0 +1,209 @@
+# backend/conversation.py
+import math
+import re
+from typing import Callable, List, Optional, Tuple
+
+# -------------------------------
+#   Config
+# -------------------------------
+HISTORY_TOKEN_BUDGET = 600  # hard cap for summary + recent turns in the prompt
+MAX_RECENT_TURNS = 6  # turns kept verbatim (one turn = one user or assistant message)
+SUMMARY_SHARE = 0.4  # part of the budget the rolling summary may use
+
+# a question that opens like this continues the previous one ("and in children?")
+_CONNECTIVE = re.compile(r"^(and|but|also|so|then|or|plus|what about|how about|what if)\b", re.IGNORECASE)
+_PRONOUNS = {"it", "its", "this", "that", "these", "those", "they", "them", "their", "he", "she", "him", "her", "his"}
+_DEMONSTRATIVES = {"this", "that", "these", "those"}  # "this rash" names its own noun...
+# ...unless a verb or predicate follows ("does that mean", "is this serious")
+_PRONOUN_FOLLOWERS = {
+    "mean", "means", "help", "helps", "work", "works", "happen", "happens", "matter", "cause", "causes", "affect",
+    "affects", "last", "lasts", "need", "require", "sound", "sounds", "count", "apply", "go", "come", "get", "make",
+    "change", "stop", "start", "serious", "normal", "dangerous", "bad", "common", "contagious", "safe", "true",
+    "ok", "okay", "treatable", "curable", "hereditary", "permanent",
+}
+# "is it safe to ...": dummy "it", refers to nothing
+_DUMMY_IT = re.compile(
+    r"\bit\s+(?:is\s+|'s\s+)?(?:\w+\s+)?(normal|ok|okay|safe|possible|bad|good|common|dangerous|necessary|true|"
+    r"important|worth|better|wise|harmful|advisable)\s+(to|for|if|that|when)\b",
+    re.IGNORECASE,
+)
+_PREPOSITIONS = {"in", "for", "with", "during", "after", "before", "at", "on", "from", "without", "while"}
+# words that can't be the antecedent of a pronoun
+_FUNCTION_WORDS = _PRONOUNS | _PREPOSITIONS | {
+    "a", "an", "the", "is", "are", "was", "were", "be", "been", "am", "do", "does", "did", "can", "could",
+    "should", "would", "will", "may", "might", "must", "shall", "has", "have", "had", "what", "which", "who",
+    "whom", "whose", "when", "where", "why", "how", "i", "me", "my", "you", "your", "we", "our", "us",
+    "and", "or", "but", "so", "if", "then", "also", "not", "no", "any", "some", "about", "to", "of", "there",
+    "long", "much", "many", "often", "soon", "far", "else", "still", "really", "usually",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token), good enough for budgeting."""
+    return math.ceil(len(text) / 4)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Keep the end of the text (most recent information) within max_tokens."""
+    max_chars = max_tokens * 4
+    if max_chars <= 0:
+        return ""
+    if len(text) <= max_chars:
+        return text
+    cut = text[-max_chars:]
+    return cut[cut.find(" ") + 1:] if " " in cut else cut
+
+
+_SUMMARY_PREFIX = "Summary of earlier conversation: "
+
+
+def _format_turns(turns: List[Tuple[str, str]]) -> str:
+    return "\n".join(f"{'User' if role == 'user' else 'Assistant'}: {text}" for role, text in turns)
+
+
+# -------------------------------
+#   LLM helpers
+# -------------------------------
+
+def llm_summarize(summary: str, turns: List[Tuple[str, str]]) -> str:
+    """Fold older turns into the running summary with one short LLM call."""
+    from backend.groq_client import groq_generate
+
+    prompt = f"""
+Update the summary of a conversation between a user and a medical assistant.
+Keep only facts useful for later questions (topics, symptoms, ages, conditions). At most 3 sentences.
+
+Current summary:
+{summary or "(empty)"}
+
+New messages:
+{_format_turns(turns)}
+
+Updated summary:
+"""
+    result = groq_generate(prompt.strip(), max_tokens=120, temperature=0.0)
+    if result.startswith("[Groq Error]"):
+        return summary
+    return result.strip()
+
+
+def llm_rewrite(history: str, query: str) -> str:
+    from backend.groq_client import groq_generate
+
+    prompt = f"""
+Rewrite the user's last question as a single standalone question that can be understood
+without the conversation. Keep medical terms. Output only the question.
+
+Conversation:
+{history}
+
+Last question: {query}
+
+Standalone question:
+"""
+    return groq_generate(prompt.strip(), max_tokens=64, temperature=0.0)
+
+
+# -------------------------------
+#   Memory
+# -------------------------------
+
+class ConversationMemory:
+    """
+    Bounded conversation history.
+    - The most recent turns are kept verbatim.
+    - Older turns are folded into a rolling summary, one batch at a time (never re-summarizing everything).
+    - render() never exceeds token_budget (estimated tokens), prefixes and role labels included.
+    """
+
+    def __init__(self, token_budget: int = HISTORY_TOKEN_BUDGET, max_recent_turns: int = MAX_RECENT_TURNS,
+                 summarize: Optional[Callable[[str, List[Tuple[str, str]]], str]] = None):
+        self.token_budget = token_budget
+        self.max_recent_turns = max_recent_turns
+        self.summarize = summarize or llm_summarize
+        self.summary = ""
+        self.turns: List[Tuple[str, str]] = []  # (role, text), role = "user" | "assistant"
+
+    def is_empty(self) -> bool:
+        return not self.turns and not self.summary
+
+    def add_turn(self, role: str, text: str) -> None:
+        self.turns.append((role, text.strip()))
+        self._compact()
+
+    def clear(self) -> None:
+        self.summary = ""
+        self.turns = []
+
+    def _compact(self) -> None:
+        # budgets are measured on the text render() produces: the summary line (prefix included)
+        # gets summary_budget, the formatted turns (plus the newline after the summary) the rest
+        summary_budget = int(self.token_budget * SUMMARY_SHARE)
+        dropped = []
+        while self.turns:
+            # once there is (or will be) a summary, its share of the budget is reserved
+            has_summary = bool(self.summary or dropped)
+            reserved = summary_budget if has_summary else 0
+            turns_text = ("\n" if has_summary else "") + _format_turns(self.turns)
+            if len(self.turns) <= self.max_recent_turns and estimate_tokens(turns_text) <= self.token_budget - reserved:
+                break
+            dropped.append(self.turns.pop(0))
+        if dropped:
+            self.summary = truncate_to_tokens(self.summarize(self.summary, dropped),
+                                              summary_budget - estimate_tokens(_SUMMARY_PREFIX))
+
+    def render(self) -> str:
+        """History block for prompts: summary first, then the recent turns."""
+        parts = []
+        if self.summary:
+            parts.append(f"{_SUMMARY_PREFIX}{self.summary}")
+        if self.turns:
+            parts.append(_format_turns(self.turns))
+        return "\n".join(parts)
+
+
+# -------------------------------
+#   Query rewriting
+# -------------------------------
+
+def needs_rewrite(query: str) -> bool:
+    """
+    True when the question depends on the conversation: it opens with a connective ("and in children?"),
+    is a short prepositional fragment ("during pregnancy?"), or uses a pronoun with no noun before it
+    in the same question ("is it contagious?"). Standalone questions ("what is diabetes and how is it
+    treated?") return False, so they skip the rewrite call.
+    """
+    if _CONNECTIVE.search(query.strip()):
+        return True
+    words = re.findall(r"[a-z]+", query.lower())
+    if not words:
+        return False
+    if len(words) <= 4 and words[0] in _PREPOSITIONS:
+        return True
+
+    dummy_it = _DUMMY_IT.search(query)
+    for i, word in enumerate(words):
+        if word not in _PRONOUNS:
+            continue
+        if word == "it" and dummy_it:
+            continue
+        following = words[i + 1] if i + 1 < len(words) else ""
+        if word in _DEMONSTRATIVES and following not in _FUNCTION_WORDS and following not in _PRONOUN_FOLLOWERS:
+            continue  # determiner: "this rash", "that medicine"
+        if not any(w not in _FUNCTION_WORDS for w in words[:i]):
+            return True  # nothing in the question this pronoun can refer to
+    return False
+
+
+def rewrite_query(query: str, memory: Optional[ConversationMemory],
+                  rewrite: Callable[[str, str], str] = llm_rewrite) -> str:
+    """
+    Condense the latest question plus the conversation into a standalone query.
+    Standalone questions and empty histories skip the LLM call.
+    """
+    if memory is None or memory.is_empty() or not needs_rewrite(query):
+        return query
+    rewritten = rewrite(memory.render(), query).strip().strip('"')
+    if not rewritten or rewritten.startswith("[Groq Error]"):
+        return query
+    return rewritten.splitlines()[0]
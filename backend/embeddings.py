@@ -0,0 +1,83 @@
+# backend/embeddings.py
+import os
+from typing import List, Union
+
+# -------------------------------
+#   Config
+# -------------------------------
+# EMBEDDING_BACKEND: "torch" (SentenceTransformer, reference) or "onnx" (int8 ONNX Runtime, no torch import)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "./models/all-MiniLM-L6-v2-onnx")  # see scripts/export_onnx.py
+ONNX_MODEL_FILE = os.getenv("ONNX_MODEL_FILE", "model_int8.onnx")
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", str(min(4, os.cpu_count() or 1))))
+EMBEDDING_DIM = 384
+MAX_SEQ_LENGTH = 256  # same as the SentenceTransformer config of all-MiniLM-L6-v2
+
+
+class OnnxEmbedder:
+    """
+    all-MiniLM-L6-v2 on ONNX Runtime (CPU), with the SentenceTransformer post-processing
+    (mean pooling + L2 normalization). encode() mirrors SentenceTransformer.encode:
+    a str gives one vector, a list gives a 2-D array.
+    """
+
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR, model_file: str = ONNX_MODEL_FILE,
+                 num_threads: int = EMBEDDING_THREADS, max_length: int = MAX_SEQ_LENGTH):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = num_threads
+        opts.inter_op_num_threads = 1
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file), opts, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+    def _encode_batch(self, texts: List[str]):
+        import numpy as np
+
+        encodings = self.tokenizer.encode_batch(texts)
+        ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": ids, "attention_mask": mask, "token_type_ids": np.zeros_like(ids)}
+        feeds = {name: value for name, value in feeds.items() if name in self.input_names}
+
+        hidden = self.session.run(None, feeds)[0]  # (batch, seq, dim)
+        weights = mask[..., None].astype(np.float32)
+        pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, **kwargs):
+        import numpy as np
+
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+
+        batches = [self._encode_batch(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)]
+        embeddings = np.concatenate(batches).astype(np.float32)
+        return embeddings[0] if single else embeddings
+
+
+def load_torch_embedder():
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(EMBEDDING_MODEL)
+
+
+def get_embedder(backend: str = None):
+    """Create the query/document embedder for the configured backend."""
+    backend = backend or EMBEDDING_BACKEND
+    if backend == "torch":
+        return load_torch_embedder()
+    if backend == "onnx":
+        return OnnxEmbedder()
+    raise ValueError(f"Unknown embedding backend: {backend!r} (choose 'torch' or 'onnx')")
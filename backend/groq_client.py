@@ -1,21 +1,40 @@
 import os
+import time
 from dotenv import load_dotenv
-from groq import Groq
 
 load_dotenv()
 
+# LLM_BACKEND=stub replaces Groq with a canned answer after a fixed delay (load tests, no API key)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")
+LLM_STUB_LATENCY_S = float(os.getenv("LLM_STUB_LATENCY_S", "0.5"))
+
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
-if not GROQ_API_KEY:
-    raise ValueError("GROQ_API_KEY not found in .env file!")
+if LLM_BACKEND == "stub":
+    client = None
+else:
+    from groq import Groq
+
+    if not GROQ_API_KEY:
+        raise ValueError("GROQ_API_KEY not found in .env file!")
 
-client = Groq(api_key=GROQ_API_KEY)
+    client = Groq(api_key=GROQ_API_KEY)
 
 # Choose a fast Groq model
 GROQ_MODEL = "llama-3.1-8b-instant"
 
+STUB_ANSWER = (
+    "This is a stubbed answer used for testing. "
+    "It does not contain medical advice. "
+    "Please consult a medical professional."
+)
+
 
 def groq_generate(prompt, max_tokens=300, temperature=0.2):
+    if client is None:
+        time.sleep(LLM_STUB_LATENCY_S)
+        return STUB_ANSWER
+
     try:
         response = client.chat.completions.create(
             model=GROQ_MODEL,
@@ -29,3 +48,30 @@ def groq_generate(prompt, max_tokens=300, temperature=0.2):
 
     except Exception as e:
         return f"[Groq Error]: {str(e)}"
+
+
+def groq_generate_stream(prompt, max_tokens=300, temperature=0.2):
+    """Yield the answer in text deltas as Groq produces them."""
+    if client is None:
+        words = STUB_ANSWER.split(" ")
+        for word in words:
+            time.sleep(LLM_STUB_LATENCY_S / len(words))
+            yield word + " "
+        return
+
+    try:
+        stream = client.chat.completions.create(
+            model=GROQ_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True
+        )
+
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+    except Exception as e:
+        yield f"[Groq Error]: {str(e)}"
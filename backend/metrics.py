@@ -0,0 +1,53 @@
+import threading
+from collections import Counter, deque
+from typing import Dict, Iterable, List
+
+
+def percentile(values: Iterable[float], p: float) -> float:
+    """Nearest-rank percentile (p in 0..100). Returns 0.0 for no values."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, int(round(p / 100.0 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize_latencies(values: List[float]) -> Dict[str, float]:
+    """p50/p90/p99/max in milliseconds for a list of latencies in seconds."""
+    return {
+        "p50_ms": round(percentile(values, 50) * 1000, 1),
+        "p90_ms": round(percentile(values, 90) * 1000, 1),
+        "p99_ms": round(percentile(values, 99) * 1000, 1),
+        "max_ms": round(max(values, default=0.0) * 1000, 1),
+    }
+
+
+class RequestMetrics:
+    """
+    Thread-safe request counters plus a sliding window of recent latencies per route.
+    - window: number of latencies kept per route
+    """
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._lock = threading.Lock()
+        self._counts = Counter()  # (route, status) -> count
+        self._latencies = {}  # route -> deque of seconds
+
+    def record(self, route: str, status: int, latency_s: float) -> None:
+        with self._lock:
+            self._counts[(route, status)] += 1
+            if route not in self._latencies:
+                self._latencies[route] = deque(maxlen=self.window)
+            self._latencies[route].append(latency_s)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            routes = {}
+            for (route, status), n in self._counts.items():
+                entry = routes.setdefault(route, {"requests": 0, "status": {}})
+                entry["requests"] += n
+                entry["status"][str(status)] = n
+            for route, lat in self._latencies.items():
+                routes[route]["latency"] = summarize_latencies(list(lat))
+            return routes
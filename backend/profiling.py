@@ -0,0 +1,197 @@
+# backend/profiling.py
+"""
+Sampling profiler for slow requests.
+
+While enabled (RAG_PROFILE=1, or set_enabled(True) from the app's admin panel), each profiled
+request gets a sampler thread that records the request thread's stack every
+PROFILE_INTERVAL_MS. If the request takes longer than PROFILE_THRESHOLD_MS, the samples are
+written to PROFILE_DIR as a collapsed-stack file (one "frame;frame;... count" line per stack,
+readable by flamegraph.pl and speedscope) plus a JSON sidecar with the stage timings and
+cache status. Both are named after the request's cache key (see rag.make_cache_key).
+
+When disabled, profile_request() returns a shared no-op object: one flag check per request.
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Iterator, List, Optional
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./profiles")
+PROFILE_THRESHOLD_MS = float(os.getenv("RAG_PROFILE_THRESHOLD_MS", "2000"))
+PROFILE_INTERVAL_MS = float(os.getenv("RAG_PROFILE_INTERVAL_MS", "5"))
+MAX_STACK_DEPTH = 128
+
+_enabled = os.getenv("RAG_PROFILE", "0") == "1"
+_threshold_ms = PROFILE_THRESHOLD_MS
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def set_enabled(enabled: bool, threshold_ms: Optional[float] = None) -> None:
+    """Switch profiling on or off at runtime (and optionally change the slow-request threshold)."""
+    global _enabled, _threshold_ms
+    _enabled = enabled
+    if threshold_ms is not None:
+        _threshold_ms = threshold_ms
+
+
+def threshold_ms() -> float:
+    return _threshold_ms
+
+
+# -------------------------------
+#   Sampler
+# -------------------------------
+
+def collapse_stack(frame, depth: int = MAX_STACK_DEPTH) -> List[str]:
+    """Frames of a stack as "module:function" names, root first."""
+    names = []
+    while frame is not None and len(names) < depth:
+        code = frame.f_code
+        names.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+        frame = frame.f_back
+    return names[::-1]
+
+
+class StackSampler:
+    """
+    Background thread sampling one thread's stack at a fixed interval.
+    Each sample is prefixed with the current stage (label_fn()), so the flame graph
+    splits by pipeline stage at its root.
+    """
+
+    def __init__(self, thread_id: int, interval_s: float, label_fn=None):
+        self.thread_id = thread_id
+        self.interval_s = interval_s
+        self.label_fn = label_fn
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = collapse_stack(frame)
+            if self.label_fn is not None:
+                stack.insert(0, f"stage:{self.label_fn()}")
+            self.samples[";".join(stack)] += 1
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        return self.samples
+
+
+# -------------------------------
+#   Per-request profile
+# -------------------------------
+
+class _NullProfile:
+    """Stands in for RequestProfile when profiling is off."""
+    cache_key = None
+    cache_status = None
+    _stage = nullcontext()
+
+    def stage(self, name: str):
+        return self._stage
+
+    def attach(self) -> None:
+        pass
+
+    def finish(self) -> Optional[str]:
+        return None
+
+
+_NULL_PROFILE = _NullProfile()
+
+
+class RequestProfile:
+    """
+    Stage timings and stack samples of one request.
+    - query: used for the file name when no cache key was set
+    - out_dir: where slow requests are written
+    """
+
+    def __init__(self, query: str, threshold_ms: float, interval_ms: float = PROFILE_INTERVAL_MS,
+                 out_dir: str = PROFILE_DIR):
+        self.query = query
+        self.threshold_ms = threshold_ms
+        self.out_dir = out_dir
+        self.cache_key: Optional[str] = None
+        self.cache_status: Optional[str] = None  # "precomputed" | "hit" | "miss" | "no_match"
+        self.stages: Dict[str, float] = {}
+        self.current_stage = "other"
+        self.started_at = time.perf_counter()
+        self._finished = False
+        self._sampler = StackSampler(threading.get_ident(), interval_ms / 1000,
+                                     label_fn=lambda: self.current_stage).start()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        previous, self.current_stage = self.current_stage, name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.perf_counter() - start) * 1000
+            self.current_stage = previous
+
+    def attach(self) -> None:
+        """Sample the calling thread from now on (a streamed answer may be consumed on another thread)."""
+        self._sampler.thread_id = threading.get_ident()
+
+    def finish(self) -> Optional[str]:
+        """
+        Stop sampling; if the request was slow, write the profile. Returns the .folded path or None.
+        Only the first call does anything.
+        """
+        if self._finished:
+            return None
+        self._finished = True
+        samples = self._sampler.stop()
+        total_ms = (time.perf_counter() - self.started_at) * 1000
+        if total_ms < self.threshold_ms:
+            return None
+        return self._write(samples, total_ms)
+
+    def _write(self, samples: Counter, total_ms: float) -> str:
+        key = self.cache_key or hashlib.sha256(self.query.strip().lower().encode("utf-8")).hexdigest()
+        base = os.path.join(self.out_dir, f"{key[:16]}_{int(time.time() * 1000)}")
+        os.makedirs(self.out_dir, exist_ok=True)
+        with open(base + ".folded", "w", encoding="utf-8") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        meta: Dict[str, Any] = {
+            "cache_key": key,
+            "query": self.query,
+            "cache_status": self.cache_status,
+            "total_ms": round(total_ms, 1),
+            "stages_ms": {name: round(ms, 1) for name, ms in self.stages.items()},
+            "samples": sum(samples.values()),
+            "interval_ms": self._sampler.interval_s * 1000,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2, ensure_ascii=False)
+        return base + ".folded"
+
+
+def profile_request(query: str):
+    """RequestProfile for this request if profiling is enabled, else a no-op."""
+    if not _enabled:
+        return _NULL_PROFILE
+    return RequestProfile(query, threshold_ms=_threshold_ms)
@@ -1,19 +1,27 @@
 # backend/rag.py
+import os
 import json
 import hashlib
-from typing import Tuple, List, Dict, Any
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, List, Dict, Any, Iterator, Optional
 # from patches.fix_numpy2 import *
 
 import chromadb
-from sentence_transformers import SentenceTransformer
 
-from backend.groq_client import groq_generate
+from backend.embeddings import get_embedder
+from backend.groq_client import groq_generate, groq_generate_stream
 from backend.cache_singleton import cache  # in-memory LRU cache singleton
+from backend.conversation import ConversationMemory, rewrite_query
+from backend.answer_store import ANSWER_STORE_PATH, AnswerStore, context_fingerprint, kb_version, watch_kb_version
+from backend.profiling import profile_request
+from backend.adaptive import NO_MATCH_ANSWER, AdaptivePolicy, adaptive_policy
 
 # -------------------------------
 #   Initialize embedder & Chroma
 # -------------------------------
-embedder = SentenceTransformer("all-MiniLM-L6-v2")
+embedder = get_embedder()  # EMBEDDING_BACKEND=torch|onnx
 
 chroma_client = chromadb.PersistentClient(path="./chroma_db")
 collection = chroma_client.get_or_create_collection(
@@ -21,39 +29,130 @@ collection = chroma_client.get_or_create_collection(
     metadata={"hnsw:space": "cosine"}
 )
 
+# RETRIEVAL_MODE=sharded routes each query to the closest per-topic collections (see backend/sharding.py).
+# VECTOR_STORE=compact serves queries from a quantized, memory-mapped copy of medical_kb
+# (build it with scripts/build_compact_index.py; ingestion rebuilds it, and it is reopened here when it changes)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "single")
+VECTOR_STORE = os.getenv("VECTOR_STORE", "chroma")
+if RETRIEVAL_MODE == "sharded" and VECTOR_STORE == "compact":
+    raise ValueError("RETRIEVAL_MODE=sharded searches the Chroma shard collections; it cannot be combined "
+                     "with VECTOR_STORE=compact")
+if RETRIEVAL_MODE == "sharded":
+    from backend.sharding import ShardRouter
+
+    vector_index = ShardRouter(chroma_client)
+elif VECTOR_STORE == "compact":
+    from backend.vector_store import COMPACT_INDEX_DIR, CompactVectorStore
+
+    vector_index = CompactVectorStore(COMPACT_INDEX_DIR)
+else:
+    vector_index = collection
+
+
+def current_vector_index():
+    """The index queries go to; a compact index rebuilt on disk since it was opened is reopened first."""
+    global vector_index
+    if hasattr(vector_index, "changed_on_disk") and vector_index.changed_on_disk():
+        vector_index = vector_index.reopen()
+    return vector_index
+
+# precomputed answers for the most frequent questions (see scripts/precompute_answers.py);
+# None until init_answer_store() is called, and lookups are skipped until then
+answer_store: Optional[AnswerStore] = None
+ANSWER_STORE_REFRESH_S = float(os.getenv("ANSWER_STORE_REFRESH_S", "300"))  # 0 disables the refresher
+_answer_store_lock = threading.Lock()
+
+
+def init_answer_store(path: Optional[str] = None, refresh_interval_s: Optional[float] = None) -> AnswerStore:
+    """
+    Open the answer store (once per process) and, if refresh_interval_s > 0, start the
+    background watcher that refreshes it after ingestion (one refresher across processes).
+    Apps and servers call this at startup; scripts pass refresh_interval_s=0.
+    """
+    global answer_store
+    with _answer_store_lock:
+        if answer_store is None:
+            answer_store = AnswerStore(path or ANSWER_STORE_PATH)
+            interval = ANSWER_STORE_REFRESH_S if refresh_interval_s is None else refresh_interval_s
+            if interval > 0:
+                watch_kb_version(answer_store, refresh_answer_store, interval_s=interval)
+        return answer_store
+
 # -------------------------------
 #   Retrieval
 # -------------------------------
 
-def retrieve_context(query: str, k: int = 3) -> Tuple[str, List[Dict[str, Any]]]:
+def retrieve_chunks(query: str, k: int = 3,
+                    where: Optional[Dict[str, Any]] = None) -> Tuple[List[str], List[Dict[str, Any]], List[float]]:
     """
-    Return combined context string and the list of metadata dicts (sources).
+    Return the k closest chunks as (documents, metadatas, cosine distances), closest first.
+    where: optional metadata pre-filter, e.g. {"topic": "fever"} (Chroma where syntax)
     """
     query_emb = embedder.encode(query).tolist()
 
-    results = collection.query(
+    results = current_vector_index().query(
         query_embeddings=[query_emb],
-        n_results=k
+        n_results=k,
+        where=where
     )
 
-    # results["documents"] is a list of lists (one per query), same for metadatas
-    retrieved_docs = results.get("documents", [[]])[0] if results.get("documents") else []
+    # results[...] are lists of lists (one per query)
+    documents = results.get("documents", [[]])[0] if results.get("documents") else []
     metadatas = results.get("metadatas", [[]])[0] if results.get("metadatas") else []
+    distances = results.get("distances", [[]])[0] if results.get("distances") else []
+    return documents, metadatas, distances
+
+
+def retrieve_context(query: str, k: int = 3, where: Optional[Dict[str, Any]] = None) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Return combined context string and the list of metadata dicts (sources).
+    """
+    retrieved_docs, metadatas, _ = retrieve_chunks(query, k=k, where=where)
 
     combined_context = "\n\n".join(retrieved_docs) if retrieved_docs else ""
 
     return combined_context, metadatas
 
 
+def retrieve_adaptive(query: str, k: int = 3, where: Optional[Dict[str, Any]] = None,
+                      policy: Optional[AdaptivePolicy] = None) -> Tuple[str, List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Like retrieve_context, but the number of chunks follows the score distribution (see backend/adaptive.py).
+    Returns (context, sources, {"k": chunks kept, "reason": str, "distances": kept distances});
+    reason "no_match" (k == 0) means nothing in the knowledge base is relevant.
+    """
+    policy = policy or adaptive_policy
+    documents, metadatas, distances = retrieve_chunks(query, k=policy.fetch_k(k), where=where)
+    n, reason = policy.choose(distances, k)
+    return "\n\n".join(documents[:n]), metadatas[:n], {"k": n, "reason": reason, "distances": distances[:n]}
+
+
+def retrieve_context_batch(queries: List[str], k: int = 3,
+                           where: Optional[Dict[str, Any]] = None) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    retrieve_context for many queries: one batched encode and one Chroma query.
+    """
+    if not queries:
+        return []
+    query_embs = embedder.encode(queries).tolist()
+    results = current_vector_index().query(query_embeddings=query_embs, n_results=k, where=where)
+
+    documents = results.get("documents") or [[] for _ in queries]
+    metadatas = results.get("metadatas") or [[] for _ in queries]
+    return [("\n\n".join(docs), metas) for docs, metas in zip(documents, metadatas)]
+
+
 # -------------------------------
 #   Prompt builder
 # -------------------------------
 
-def build_prompt(context: str, query: str, include_vitals: str = "") -> str:
+def build_prompt(context: str, query: str, include_vitals: str = "", history: str = "") -> str:
     """
-    Build a safe RAG prompt. Optionally include a small digital twin / vitals snapshot.
+    Build a safe RAG prompt. Optionally include a small digital twin / vitals snapshot
+    and the (already budgeted) conversation history.
     """
     vitals_section = f"\n\nPatient Vitals: {include_vitals}" if include_vitals else ""
+    history_section = f"\n\nConversation so far:\n{history}" if history else ""
     prompt = f"""
 You are a medical-domain AI assistant. Use ONLY the retrieved context to answer the user's question.
 If the answer is not contained in the provided context, be honest and advise consulting a medical professional.
@@ -63,7 +162,7 @@ Retrieved Context:
 {context}
 --------------------
 
-{vitals_section}
+{vitals_section}{history_section}
 
 User Question: {query}
 
@@ -112,27 +211,205 @@ def answer_query(query: str, k: int = 3, include_vitals: str = "") -> Dict[str,
 #   RAG orchestrator with cache
 # -------------------------------
 
-def answer_query_with_cache(query: str, k: int = 3, ttl_seconds: int = 3600, include_vitals: str = "") -> Dict[str, Any]:
+def answer_query_with_cache(query: str, k: int = 3, ttl_seconds: int = 3600, include_vitals: str = "",
+                            memory: Optional[ConversationMemory] = None,
+                            where: Optional[Dict[str, Any]] = None, adaptive: bool = False) -> Dict[str, Any]:
     """
     RAG pipeline with LRU TTL caching. Cache key = hash(query + retrieved_sources).
-    Returns dict: { "answer": str, "sources": list_of_metadatas, "cached": bool }
+    With a ConversationMemory, follow-ups are first rewritten into a standalone query,
+    which is used for retrieval and the cache key; the bounded history goes into the prompt.
+    where: optional metadata pre-filter for retrieval (precomputed answers are skipped).
+    adaptive: pick the number of chunks from their distances (see retrieve_adaptive); when nothing
+    relevant is found the LLM is skipped and a "consult a professional" answer is returned.
+    Returns dict: { "answer": str, "sources": list_of_metadatas, "cached": bool, "query": standalone_query }
+    (+ "retrieval": {"k", "reason", "distances"} when adaptive)
+    With profiling enabled (backend/profiling.py), slow calls leave a flame graph in PROFILE_DIR.
     """
+    profile = profile_request(query)
+    try:
+        return _answer_query_with_cache(query, k, ttl_seconds, include_vitals, memory, where, adaptive, profile)
+    finally:
+        profile.finish()
+
+
+def _answer_query_with_cache(query, k, ttl_seconds, include_vitals, memory, where, adaptive, profile) -> Dict[str, Any]:
+    # 0) Condense follow-ups into a standalone query
+    with profile.stage("rewrite"):
+        query = rewrite_query(query, memory)
+
+    # 0b) Precomputed answers for top questions, before any retrieval
+    with profile.stage("answer_store"):
+        stored = answer_store.get(query) if answer_store is not None and where is None else None
+    if stored is not None:
+        profile.cache_key, profile.cache_status = make_cache_key(query, stored["sources"]), "precomputed"
+        return {"answer": stored["answer"], "sources": stored["sources"], "cached": True,
+                "precomputed": True, "query": query}
+
     # 1) Retrieve
-    context, sources = retrieve_context(query, k=k)
+    extra = {}
+    with profile.stage("retrieve"):
+        if adaptive:
+            context, sources, extra["retrieval"] = retrieve_adaptive(query, k=k, where=where)
+        else:
+            context, sources = retrieve_context(query, k=k, where=where)
+    if adaptive and extra["retrieval"]["reason"] == "no_match":
+        profile.cache_key, profile.cache_status = make_cache_key(query, []), "no_match"
+        return {"answer": NO_MATCH_ANSWER, "sources": [], "cached": False, "query": query, **extra}
 
     # 2) Build cache key
     cache_key = make_cache_key(query, sources)
+    profile.cache_key = cache_key
 
     # 3) Check cache
-    cached = cache.get(cache_key)
+    with profile.stage("cache"):
+        cached = cache.get(cache_key)
     if cached is not None:
-        return {"answer": cached["answer"], "sources": sources, "cached": True}
+        profile.cache_status = "hit"
+        return {"answer": cached["answer"], "sources": sources, "cached": True, "query": query, **extra}
+    profile.cache_status = "miss"
 
     # 4) Build prompt and call LLM
-    prompt = build_prompt(context, query, include_vitals=include_vitals)
-    answer = groq_generate(prompt)
+    history = memory.render() if memory is not None else ""
+    prompt = build_prompt(context, query, include_vitals=include_vitals, history=history)
+    with profile.stage("generate"):
+        answer = groq_generate(prompt)
 
     # 5) Store in cache
     cache.set(cache_key, {"answer": answer, "prompt": prompt}, ttl=ttl_seconds)
 
-    return {"answer": answer, "sources": sources, "cached": False}
+    return {"answer": answer, "sources": sources, "cached": False, "query": query, **extra}
+
+
+# -------------------------------
+#   Streaming orchestrator with cache
+# -------------------------------
+
+def stream_answer_with_cache(query: str, k: int = 3, ttl_seconds: int = 3600, include_vitals: str = "",
+                             memory: Optional[ConversationMemory] = None,
+                             where: Optional[Dict[str, Any]] = None, adaptive: bool = False) -> Dict[str, Any]:
+    """
+    Same pipeline as answer_query_with_cache, but the answer arrives as text deltas.
+    Returns dict: { "stream": iterator of str, "sources": list_of_metadatas, "cached": bool,
+                    "cache_key": str, "query": standalone_query } (+ "retrieval" when adaptive)
+    (+ "answer": str when the full text is already known: precomputed, cached or no-match answers)
+    The answer is stored in the cache once the stream has been fully consumed.
+    With profiling enabled, a generated answer is profiled until its stream is exhausted or closed.
+    """
+    profile = profile_request(query)
+    try:
+        result = _stream_answer_with_cache(query, k, ttl_seconds, include_vitals, memory, where, adaptive, profile)
+    except BaseException:
+        profile.finish()
+        raise
+    if profile.cache_status != "miss":  # nothing left to generate
+        profile.finish()
+    return result
+
+
+def _stream_answer_with_cache(query, k, ttl_seconds, include_vitals, memory, where, adaptive,
+                              profile) -> Dict[str, Any]:
+    with profile.stage("rewrite"):
+        query = rewrite_query(query, memory)
+
+    with profile.stage("answer_store"):
+        stored = answer_store.get(query) if answer_store is not None and where is None else None
+    if stored is not None:
+        profile.cache_key, profile.cache_status = make_cache_key(query, stored["sources"]), "precomputed"
+        return {"stream": iter([stored["answer"]]), "answer": stored["answer"], "sources": stored["sources"],
+                "cached": True, "precomputed": True, "cache_key": profile.cache_key, "query": query}
+
+    extra = {}
+    with profile.stage("retrieve"):
+        if adaptive:
+            context, sources, extra["retrieval"] = retrieve_adaptive(query, k=k, where=where)
+        else:
+            context, sources = retrieve_context(query, k=k, where=where)
+    cache_key = make_cache_key(query, sources)
+    profile.cache_key = cache_key
+
+    if adaptive and extra["retrieval"]["reason"] == "no_match":
+        profile.cache_status = "no_match"
+        return {"stream": iter([NO_MATCH_ANSWER]), "answer": NO_MATCH_ANSWER, "sources": [], "cached": False,
+                "cache_key": cache_key, "query": query, **extra}
+
+    with profile.stage("cache"):
+        cached = cache.get(cache_key)
+    if cached is not None:
+        profile.cache_status = "hit"
+        return {"stream": iter([cached["answer"]]), "answer": cached["answer"], "sources": sources, "cached": True,
+                "cache_key": cache_key, "query": query, **extra}
+    profile.cache_status = "miss"
+
+    history = memory.render() if memory is not None else ""
+    prompt = build_prompt(context, query, include_vitals=include_vitals, history=history)
+
+    def _stream() -> Iterator[str]:
+        parts = []
+        deltas = groq_generate_stream(prompt)
+        try:
+            while True:
+                # only time spent waiting on the LLM counts as "generate", not the consumer's work between deltas
+                profile.attach()
+                with profile.stage("generate"):
+                    delta = next(deltas, None)
+                if delta is None:
+                    break
+                parts.append(delta)
+                yield delta
+            cache.set(cache_key, {"answer": "".join(parts), "prompt": prompt}, ttl=ttl_seconds)
+        finally:
+            profile.finish()
+
+    stream = _stream()
+    weakref.finalize(stream, profile.finish)  # a stream that is dropped before it starts never runs its finally
+    return {"stream": stream, "sources": sources, "cached": False, "cache_key": cache_key, "query": query,
+            **extra}
+
+
+# -------------------------------
+#   Precomputed answer store
+# -------------------------------
+
+def _generate_and_store(query: str, context: str, sources: List[Dict[str, Any]], k: int, store: AnswerStore) -> bool:
+    answer = groq_generate(build_prompt(context, query))
+    if answer.startswith("[Groq Error]"):
+        return False
+    store.put(query, answer, sources, context_fingerprint(context), k=k)
+    return True
+
+
+def precompute_answers(queries: List[str], k: int = 3, workers: int = 4, store: Optional[AnswerStore] = None) -> int:
+    """
+    Run the full RAG pipeline for many questions (batched retrieval, parallel LLM calls)
+    and save the answers in the answer store. Returns the number of answers stored.
+    """
+    store = store or init_answer_store(refresh_interval_s=0)
+    version = kb_version()
+    contexts = retrieve_context_batch(queries, k=k)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        stored = sum(pool.map(lambda args: _generate_and_store(*args, k, store),
+                              [(q, ctx, srcs) for q, (ctx, srcs) in zip(queries, contexts)]))
+    store.set_meta("kb_version", version)  # answers match the current knowledge base
+    return stored
+
+
+def refresh_answer_store(store: Optional[AnswerStore] = None, workers: int = 4) -> int:
+    """
+    Re-retrieve every stored question and regenerate the answers whose chunks changed.
+    Returns the number of answers regenerated.
+    """
+    store = store or init_answer_store(refresh_interval_s=0)
+    by_k = {}
+    for entry in store.entries():
+        by_k.setdefault(entry["k"], []).append(entry)
+
+    stale = []
+    for k, entries in by_k.items():
+        contexts = retrieve_context_batch([e["query"] for e in entries], k=k)
+        for entry, (context, sources) in zip(entries, contexts):
+            if context_fingerprint(context) != entry["fingerprint"]:
+                stale.append((entry["query"], context, sources, k))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return sum(pool.map(lambda args: _generate_and_store(*args, store), stale))
+
@@ -0,0 +1,126 @@
+# backend/sharding.py
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+SHARD_PREFIX = "medical_kb_"
+CENTROIDS_PATH = os.getenv("TOPIC_CENTROIDS_PATH", "./chroma_db/topic_centroids.json")
+MAX_SHARDS = int(os.getenv("MAX_SHARDS", "2"))  # shards searched per query
+ROUTE_MARGIN = float(os.getenv("ROUTE_MARGIN", "0.05"))  # also search shards this close to the best one
+
+
+def shard_name(topic: str) -> str:
+    return SHARD_PREFIX + topic
+
+
+def _unit(x: np.ndarray) -> np.ndarray:
+    return x / np.clip(np.linalg.norm(x, axis=-1, keepdims=True), 1e-12, None)
+
+
+def compute_centroids(embeddings_by_topic: Dict[str, List[List[float]]]) -> Dict[str, List[float]]:
+    """Mean of the (normalized) chunk embeddings of each topic, normalized again."""
+    return {
+        topic: _unit(_unit(np.asarray(embeddings, dtype=np.float32)).mean(axis=0)).tolist()
+        for topic, embeddings in embeddings_by_topic.items()
+        if len(embeddings)
+    }
+
+
+def shard_centroids(chroma_client, page_size: int = 5000) -> Dict[str, List[float]]:
+    """
+    Centroids of every shard collection, from the chunks it holds now (read page by page),
+    so topics that were not re-ingested in the last run keep their centroid.
+    """
+    centroids = {}
+    for collection in chroma_client.list_collections():
+        name = getattr(collection, "name", collection)  # names (Chroma >= 0.6) or collections
+        if not name.startswith(SHARD_PREFIX):
+            continue
+        shard = chroma_client.get_collection(name)
+        total = None
+        for offset in range(0, shard.count(), page_size):
+            page = shard.get(include=["embeddings"], limit=page_size, offset=offset)
+            summed = _unit(np.asarray(page["embeddings"], dtype=np.float32)).sum(axis=0)
+            total = summed if total is None else total + summed
+        if total is not None:
+            centroids[name[len(SHARD_PREFIX):]] = _unit(total).tolist()
+    return centroids
+
+
+def save_centroids(centroids: Dict[str, List[float]], path: str = CENTROIDS_PATH) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(centroids, f)
+
+
+def load_centroids(path: str = CENTROIDS_PATH) -> Dict[str, List[float]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def available_topics(path: str = CENTROIDS_PATH) -> List[str]:
+    return sorted(load_centroids(path))
+
+
+# -------------------------------
+#   Router
+# -------------------------------
+
+class ShardRouter:
+    """
+    Route each query to the topic shard(s) whose centroid is closest to the query embedding,
+    search them in parallel and merge by distance.
+    query() has the same signature and result shape as a Chroma collection's.
+    A where filter on "topic" selects shards directly instead of classifying.
+    """
+
+    def __init__(self, chroma_client, centroids: Optional[Dict[str, List[float]]] = None,
+                 max_shards: int = MAX_SHARDS, margin: float = ROUTE_MARGIN, workers: int = 8):
+        centroids = centroids if centroids is not None else load_centroids()
+        if not centroids:
+            raise ValueError(f"No topic centroids found at {CENTROIDS_PATH}; re-run scripts/ingest.py")
+        self.topics = list(centroids)
+        self.centroid_matrix = _unit(np.asarray([centroids[t] for t in self.topics], dtype=np.float32))
+        self.collections = {t: chroma_client.get_collection(shard_name(t)) for t in self.topics}
+        self.max_shards = max_shards
+        self.margin = margin
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+
+    def route(self, query_embedding: List[float]) -> List[str]:
+        """Topics to search: the closest centroid, plus others within margin of it (up to max_shards)."""
+        scores = self.centroid_matrix @ _unit(np.asarray(query_embedding, dtype=np.float32))
+        order = np.argsort(-scores)[:self.max_shards]
+        best = scores[order[0]]
+        return [self.topics[i] for i in order if scores[i] >= best - self.margin]
+
+    def _topics_for(self, query_embedding: List[float], where: Optional[Dict[str, Any]]) -> List[str]:
+        topic = (where or {}).get("topic")
+        if isinstance(topic, str):
+            return [topic] if topic in self.collections else []
+        if isinstance(topic, dict) and "$in" in topic:
+            return [t for t in topic["$in"] if t in self.collections]
+        return self.route(query_embedding)
+
+    def _search_shard(self, topic: str, query_embedding: List[float], n_results: int,
+                      where: Optional[Dict[str, Any]]):
+        res = self.collections[topic].query(query_embeddings=[query_embedding], n_results=n_results, where=where)
+        return list(zip(res["ids"][0], res["documents"][0], res["metadatas"][0], res["distances"][0]))
+
+    def query(self, query_embeddings: List[List[float]], n_results: int = 3,
+              where: Optional[Dict[str, Any]] = None) -> Dict[str, List[list]]:
+        out = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for emb in query_embeddings:
+            topics = self._topics_for(emb, where)
+            futures = [self._pool.submit(self._search_shard, t, emb, n_results, where) for t in topics]
+            hits = sorted((h for f in futures for h in f.result()), key=lambda h: h[3])[:n_results]
+            out["ids"].append([h[0] for h in hits])
+            out["documents"].append([h[1] for h in hits])
+            out["metadatas"].append([h[2] for h in hits])
+            out["distances"].append([h[3] for h in hits])
+        return out
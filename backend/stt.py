@@ -0,0 +1,237 @@
+# backend/stt.py
+import os
+import queue
+import threading
+import wave
+from concurrent.futures import Future
+from typing import Callable, List, Optional
+
+# -------------------------------
+#   Config
+# -------------------------------
+# STT_BACKEND: "local" (on-device Whisper, default) or "google" (cloud recognizer)
+STT_BACKEND = os.getenv("STT_BACKEND", "local")
+LOCAL_STT_MODEL = os.getenv("LOCAL_STT_MODEL", "openai/whisper-tiny.en")
+STT_MAX_BATCH = int(os.getenv("STT_MAX_BATCH", "4"))
+STT_MAX_WAIT_MS = int(os.getenv("STT_MAX_WAIT_MS", "50"))
+
+
+class TranscriptionError(Exception):
+    """Raised when a backend could not turn the audio into text."""
+
+
+# -------------------------------
+#   Micro-batching worker
+# -------------------------------
+
+class MicroBatcher:
+    """
+    Collect concurrent single-item requests into batches for one worker thread.
+    - batch_fn: takes a list of items, returns a list of results (same order)
+    - max_batch: max items per batch
+    - max_wait_ms: how long to wait for more items after the first one arrives
+    batch_fn may return an Exception in place of a result to fail just that item.
+    """
+
+    def __init__(self, batch_fn: Callable[[List], List], max_batch: int = 4, max_wait_ms: int = 50):
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()  # (item, future)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, item) -> Future:
+        fut = Future()
+        self._queue.put((item, fut))
+        return fut
+
+    def __call__(self, item):
+        return self.submit(item).result()
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]  # block for the first item
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get(timeout=self.max_wait))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = self.batch_fn(items)
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            for (_, fut), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    fut.set_exception(result)
+                else:
+                    fut.set_result(result)
+
+
+# -------------------------------
+#   Audio helpers
+# -------------------------------
+
+def load_wav(path: str):
+    """
+    Read a 16-bit PCM wav file into (float32 mono array, sample_rate).
+    Raises TranscriptionError for unreadable files and other sample formats.
+    """
+    import numpy as np
+
+    try:
+        with wave.open(path, "rb") as wf:
+            rate = wf.getframerate()
+            channels = wf.getnchannels()
+            width = wf.getsampwidth()
+            frames = wf.readframes(wf.getnframes())
+    except (wave.Error, EOFError, OSError) as e:
+        raise TranscriptionError(f"Could not read the recording: {e}")
+    if width != 2:
+        raise TranscriptionError(f"Unsupported audio format: {8 * width}-bit samples (expected 16-bit PCM).")
+
+    audio = np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1)
+    return audio, rate
+
+
+def wav_duration(path: str) -> float:
+    with wave.open(path, "rb") as wf:
+        return wf.getnframes() / float(wf.getframerate())
+
+
+# -------------------------------
+#   Backends
+# -------------------------------
+
+class STTBackend:
+    """Interface: turn a wav file into text."""
+
+    name = "base"
+
+    def transcribe(self, audio_path: str) -> str:
+        raise NotImplementedError
+
+    def transcribe_batch(self, audio_paths: List[str]) -> List[str]:
+        return [self.transcribe(p) for p in audio_paths]
+
+
+class LocalWhisperSTT(STTBackend):
+    """
+    On-device Whisper running on CPU.
+    The model is int8 dynamically quantized and loaded lazily, once per process.
+    Concurrent transcribe() calls are grouped into batches by a MicroBatcher.
+    """
+
+    name = "local"
+
+    def __init__(self, model_name: str = LOCAL_STT_MODEL, max_batch: int = STT_MAX_BATCH,
+                 max_wait_ms: int = STT_MAX_WAIT_MS, quantize: bool = True):
+        self.model_name = model_name
+        self.quantize = quantize
+        self._pipe = None
+        self._load_lock = threading.Lock()
+        self._batcher = MicroBatcher(self._run_batch, max_batch=max_batch, max_wait_ms=max_wait_ms)
+
+    def _load(self):
+        with self._load_lock:
+            if self._pipe is None:
+                try:
+                    import torch
+                    from transformers import pipeline
+
+                    pipe = pipeline("automatic-speech-recognition", model=self.model_name, device="cpu")
+                    if self.quantize:
+                        pipe.model = torch.quantization.quantize_dynamic(
+                            pipe.model, {torch.nn.Linear}, dtype=torch.qint8
+                        )
+                except (ImportError, OSError, ValueError, RuntimeError) as e:
+                    raise TranscriptionError(f"Speech model {self.model_name!r} unavailable: {e}")
+                self._pipe = pipe
+        return self._pipe
+
+    def _run_batch(self, audio_paths: List[str]) -> list:
+        pipe = self._load()
+        # a file that can't be decoded fails only its own request
+        results, inputs, positions = [None] * len(audio_paths), [], []
+        for i, path in enumerate(audio_paths):
+            try:
+                audio, rate = load_wav(path)
+            except TranscriptionError as e:
+                results[i] = e
+                continue
+            inputs.append({"raw": audio, "sampling_rate": rate})
+            positions.append(i)
+        if inputs:
+            try:
+                outputs = pipe(inputs, batch_size=len(inputs))
+            except (RuntimeError, ValueError) as e:
+                raise TranscriptionError(f"Transcription failed: {e}")
+            for i, o in zip(positions, outputs):
+                results[i] = o["text"].strip()
+        return results
+
+    @staticmethod
+    def _text(future: Future) -> str:
+        text = future.result()
+        if not text:
+            raise TranscriptionError("No speech detected.")
+        return text
+
+    def transcribe(self, audio_path: str) -> str:
+        return self._text(self._batcher.submit(audio_path))
+
+    def transcribe_batch(self, audio_paths: List[str]) -> List[str]:
+        futures = [self._batcher.submit(p) for p in audio_paths]
+        return [self._text(f) for f in futures]
+
+
+class GoogleSTT(STTBackend):
+    """Cloud recognizer from SpeechRecognition (needs network)."""
+
+    name = "google"
+
+    def transcribe(self, audio_path: str) -> str:
+        import speech_recognition as sr
+
+        recognizer = sr.Recognizer()
+        try:
+            with sr.AudioFile(audio_path) as source:
+                audio_data = recognizer.record(source)
+        except (ValueError, OSError, EOFError) as e:
+            raise TranscriptionError(f"Could not read the recording: {e}")
+
+        try:
+            return recognizer.recognize_google(audio_data)
+        except sr.UnknownValueError:
+            raise TranscriptionError("Could not understand the voice.")
+        except sr.RequestError as e:
+            raise TranscriptionError(f"Speech service unavailable: {e}")
+
+
+# -------------------------------
+#   Shared instance
+# -------------------------------
+
+_BACKENDS = {"local": LocalWhisperSTT, "google": GoogleSTT}
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_stt_backend(name: Optional[str] = None) -> STTBackend:
+    """Return the process-wide backend instance (shared across Streamlit sessions)."""
+    name = name or STT_BACKEND
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown STT backend: {name!r} (choose from {sorted(_BACKENDS)})")
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = _BACKENDS[name]()
+        return _instances[name]
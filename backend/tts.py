@@ -0,0 +1,223 @@
+# backend/tts.py
+import hashlib
+import io
+import multiprocessing
+import os
+import queue
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, Executor, ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from backend.cache_singleton import audio_cache
+
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "2"))
+
+# -------------------------------
+#   Sentence splitting
+# -------------------------------
+
+# words that end with a period but don't end a sentence
+ABBREVIATIONS = {"dr", "mr", "mrs", "ms", "vs", "e.g", "i.e", "approx", "fig"}
+NUMBER_ABBREVIATIONS = {"no"}  # only an abbreviation when a number follows ("No. 5")
+MIN_SENTENCE_CHARS = 20
+
+_BOUNDARY = re.compile(r"[.!?]+[\"')\]]*\s+|\n+")
+
+
+class SentenceSplitter:
+    """
+    Incrementally split a stream of text deltas into sentences.
+    feed() returns the sentences completed so far; flush() returns the remainder.
+    Very short sentences are merged into the next one so the engine isn't called for "Yes."
+    """
+
+    def __init__(self, min_chars: int = MIN_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self._buf = ""
+
+    @staticmethod
+    def _last_word(text: str, end: int) -> str:
+        words = text[:end].rstrip(".!?\"')]").split()
+        return words[-1].lower().rstrip(".") if words else ""
+
+    def feed(self, delta: str) -> List[str]:
+        self._buf += delta
+        sentences = []
+        start = 0
+        for m in _BOUNDARY.finditer(self._buf):
+            if self._buf[m.start()] == ".":
+                word = self._last_word(self._buf, m.start() + 1)
+                if word in ABBREVIATIONS:
+                    continue
+                if word in NUMBER_ABBREVIATIONS:
+                    following = self._buf[m.end():m.end() + 1]
+                    if not following:
+                        break  # wait for the next delta to see whether a number follows
+                    if following.isdigit():
+                        continue
+            candidate = self._buf[start:m.end()].strip()
+            if len(candidate) < self.min_chars:
+                continue  # keep growing it with the next sentence
+            sentences.append(candidate)
+            start = m.end()
+        self._buf = self._buf[start:]
+        return sentences
+
+    def flush(self) -> List[str]:
+        rest, self._buf = self._buf.strip(), ""
+        return [rest] if rest else []
+
+
+def split_sentences(text: str) -> List[str]:
+    splitter = SentenceSplitter()
+    return splitter.feed(text) + splitter.flush()
+
+
+# -------------------------------
+#   Local engine (runs in worker processes)
+# -------------------------------
+
+_engine = None
+
+
+def synthesize_wav(text: str) -> bytes:
+    """Render one sentence to wav bytes with the offline pyttsx3 engine."""
+    global _engine
+    import pyttsx3
+
+    if _engine is None:
+        _engine = pyttsx3.init()
+
+    fd, path = tempfile.mkstemp(suffix=".wav")
+    os.close(fd)
+    try:
+        _engine.save_to_file(text, path)
+        _engine.runAndWait()
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+
+def play_wav(data: bytes) -> None:
+    """Play wav bytes on the local audio device (blocking)."""
+    from pydub import AudioSegment
+    from pydub.playback import play
+
+    play(AudioSegment.from_wav(io.BytesIO(data)))
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> Executor:
+    """
+    Shared synthesis pool. pyttsx3 keeps one engine per process and isn't thread-safe,
+    so sentences are synthesized in separate processes. Workers are spawned, not forked:
+    the app has background threads (STT batcher, answer-store refresher, profiler) whose
+    locks a forked child could inherit in a held state.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=TTS_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+# -------------------------------
+#   Streaming playback
+# -------------------------------
+
+def audio_key(answer: str) -> str:
+    """audio_cache key: the spoken text itself, so clips can never belong to another answer."""
+    return hashlib.sha256(answer.strip().encode("utf-8")).hexdigest()
+
+
+class SpeechSession:
+    """
+    Speak one answer while it is still being generated.
+    - Completed sentences are synthesized in parallel on the executor.
+    - A playback thread plays the clips strictly in order.
+    - answer: the full text, when it is already known (cached or precomputed answers); if audio
+      for it is cached, the cached clips are played instead.
+    started_at is the perf_counter() timestamp the question was asked; first_audio_s is
+    measured from it.
+    """
+
+    def __init__(self, answer: Optional[str] = None, started_at: Optional[float] = None,
+                 synthesize: Callable[[str], bytes] = synthesize_wav,
+                 play: Callable[[bytes], None] = play_wav,
+                 executor: Optional[Executor] = None, ttl_seconds: int = 3600):
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.synthesize = synthesize
+        self.play = play
+        self.executor = executor or get_executor()
+        self.ttl_seconds = ttl_seconds
+        self.first_audio_s = None
+        self.clips = []
+        self._splitter = SentenceSplitter()
+        self._parts = []  # text fed so far
+        self._queue = queue.Queue()  # futures in playback order, None = end
+        self.error: Optional[Exception] = None  # first synthesis/playback failure, if any
+
+        cached = audio_cache.get(audio_key(answer)) if answer else None
+        self.from_cache = cached is not None
+        if self.from_cache:
+            for clip in cached:
+                fut = Future()
+                fut.set_result(clip)
+                self._queue.put(fut)
+
+        self._player = threading.Thread(target=self._playback, daemon=True)
+        self._player.start()
+
+    def _submit(self, sentence: str) -> None:
+        self._queue.put(self.executor.submit(self.synthesize, sentence))
+
+    def _playback(self) -> None:
+        while True:
+            fut = self._queue.get()
+            if fut is None:
+                return
+            try:
+                clip = fut.result()
+                if self.first_audio_s is None:
+                    self.first_audio_s = time.perf_counter() - self.started_at
+                self.play(clip)
+                self.clips.append(clip)
+            except Exception as e:
+                if self.error is None:
+                    self.error = e
+                # keep draining so finish() doesn't hang
+
+    def feed(self, delta: str) -> None:
+        self._parts.append(delta)
+        if self.from_cache:
+            return
+        for sentence in self._splitter.feed(delta):
+            self._submit(sentence)
+
+    def finish(self) -> None:
+        """Flush the last sentence, wait for playback to end and cache the audio."""
+        if not self.from_cache:
+            for sentence in self._splitter.flush():
+                self._submit(sentence)
+        self._queue.put(None)
+        self._player.join()
+        if self.error is None and not self.from_cache and self.clips:
+            audio_cache.set(audio_key(self.text), list(self.clips), ttl=self.ttl_seconds)
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    def wrap(self, chunks: Iterable[str]) -> Iterator[str]:
+        """Pass text deltas through unchanged while speaking them."""
+        for delta in chunks:
+            self.feed(delta)
+            yield delta
+        self.finish()
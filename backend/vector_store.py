@@ -0,0 +1,288 @@
+# backend/vector_store.py
+"""
+Compact, memory-mapped vector index for large corpora.
+
+Files in index_dir:
+    vectors_f32.npy     full-precision (normalized) vectors — only rows picked for rescoring are read
+    codes_int8.npy      int8 codes + scales.npy (per-dimension scale), or codes_f16.npy
+    codes_bits.npy      optional packed sign bits for a first-pass Hamming scan
+    documents.jsonl     one {"id", "document", "metadata"} per line, offsets.npy for random access
+
+Search: [Hamming scan over bits] -> score compressed codes -> rescore top candidates in float32.
+Distances are cosine distances (1 - cos), like the Chroma "cosine" collection.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+COMPACT_INDEX_DIR = os.getenv("COMPACT_INDEX_DIR", "./compact_index")
+BLOCK_ROWS = 65536  # rows scored at a time, bounds temporary memory
+RELOAD_CHECK_S = 1.0  # how often changed_on_disk() actually looks at index.json
+WHERE_OVERFETCH = 10  # a where filter is applied to n_results * WHERE_OVERFETCH nearest rows
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    return x / np.clip(np.linalg.norm(x, axis=-1, keepdims=True), 1e-12, None)
+
+
+def _top(scores: np.ndarray, n: int) -> np.ndarray:
+    """Indices of the n largest scores, best first."""
+    if n >= len(scores):
+        return np.argsort(-scores)
+    idx = np.argpartition(-scores, n)[:n]
+    return idx[np.argsort(-scores[idx])]
+
+
+class CompactVectorStore:
+    """
+    - quantization: "int8" (4x smaller than float32) or "float16" (2x smaller)
+    - binary: also keep 1 bit per dimension (32x smaller) for a first-pass scan
+    - rescore_factor: candidates rescored at full precision = k * rescore_factor
+    - binary_factor: candidates kept after the Hamming scan = k * rescore_factor * binary_factor
+    """
+
+    def __init__(self, index_dir: str, rescore_factor: int = 4, binary_factor: int = 8):
+        self.index_dir = index_dir
+        self.rescore_factor = rescore_factor
+        self.binary_factor = binary_factor
+
+        index_json = os.path.join(index_dir, "index.json")
+        with open(index_json, encoding="utf-8") as f:
+            self.config = json.load(f)
+        self._identity = self._file_identity(index_json)
+        self._checked_at = time.monotonic()
+        self.quantization = self.config["quantization"]
+
+        load = lambda name: np.load(os.path.join(index_dir, name), mmap_mode="r")
+        self.vectors = load("vectors_f32.npy")
+        if self.quantization == "int8":
+            self.codes = load("codes_int8.npy")
+            self.scales = np.load(os.path.join(index_dir, "scales.npy"))
+        else:
+            self.codes = load("codes_f16.npy")
+            self.scales = None
+        self.bits = load("codes_bits.npy") if self.config["binary"] else None
+        self.offsets = load("offsets.npy")
+        self._docs = open(os.path.join(index_dir, "documents.jsonl"), "rb")
+        self._docs_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+
+    @staticmethod
+    def _file_identity(path: str):
+        st = os.stat(path)
+        return st.st_ino, st.st_mtime_ns
+
+    def changed_on_disk(self) -> bool:
+        """True once the index has been rebuilt since it was opened (checked at most every RELOAD_CHECK_S)."""
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_CHECK_S:
+            return False
+        self._checked_at = now
+        try:
+            return self._file_identity(os.path.join(self.index_dir, "index.json")) != self._identity
+        except FileNotFoundError:
+            return False  # mid-swap; look again later
+
+    def reopen(self) -> "CompactVectorStore":
+        """A new store over the current files; searches running on this one keep their (old) mappings."""
+        return CompactVectorStore(self.index_dir, rescore_factor=self.rescore_factor, binary_factor=self.binary_factor)
+
+    # -------------------------------
+    #   Build
+    # -------------------------------
+
+    @staticmethod
+    def build(index_dir: str, ids: Sequence[str], embeddings, documents: Sequence[str],
+              metadatas: Sequence[Dict[str, Any]], quantization: str = "int8", binary: bool = True) -> None:
+        """Build from in-memory data; see build_from_pages() for collections that don't fit in memory."""
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) == 0:
+            raise ValueError("Cannot build a compact index without embeddings (is the collection empty?)")
+        CompactVectorStore.build_from_pages(index_dir, [(ids, vectors, documents, metadatas)], len(vectors),
+                                            vectors.shape[1], quantization=quantization, binary=binary)
+
+    @staticmethod
+    def build_from_pages(index_dir: str, pages: Iterable[Tuple[Sequence[str], Any, Sequence[str], Sequence[Dict[str, Any]]]],
+                         count: int, dim: int, quantization: str = "int8", binary: bool = True) -> None:
+        """
+        Write the index from pages of (ids, embeddings, documents, metadatas), count rows of dim
+        dimensions in total. Rows go straight into memory-mapped files, so memory use is one page
+        plus BLOCK_ROWS rows, whatever the collection size.
+        The index is written into a temporary directory, then swapped in place of index_dir, so open
+        stores never see a half-written index (they pick up the new one via changed_on_disk()).
+        """
+        if quantization not in ("int8", "float16"):
+            raise ValueError(f"Unknown quantization: {quantization!r} (choose 'int8' or 'float16')")
+        if count <= 0 or dim <= 0:
+            raise ValueError("Cannot build a compact index without embeddings (is the collection empty?)")
+
+        index_dir = os.path.normpath(index_dir)
+        tmp_dir = f"{index_dir}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        try:
+            CompactVectorStore._write(tmp_dir, pages, count, dim, quantization, binary)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        old_dir = f"{index_dir}.old-{os.getpid()}"
+        if os.path.exists(index_dir):
+            os.rename(index_dir, old_dir)
+        os.rename(tmp_dir, index_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)  # mapped files stay readable until closed
+
+    @staticmethod
+    def _write(index_dir: str, pages, count: int, dim: int, quantization: str, binary: bool) -> None:
+        path = lambda name: os.path.join(index_dir, name)
+        open_memmap = np.lib.format.open_memmap
+
+        # pass 1: normalized vectors, documents and offsets, page by page; per-dimension max for int8 scales
+        vectors = open_memmap(path("vectors_f32.npy"), mode="w+", dtype=np.float32, shape=(count, dim))
+        offsets = open_memmap(path("offsets.npy"), mode="w+", dtype=np.int64, shape=(count,))
+        max_abs = np.zeros(dim, dtype=np.float32)
+        row = 0
+        with open(path("documents.jsonl"), "wb") as f:
+            for ids, embeddings, documents, metadatas in pages:
+                block = np.asarray(embeddings, dtype=np.float32)
+                if len(block) == 0:
+                    continue
+                if block.ndim != 2 or block.shape[1] != dim or row + len(block) > count:
+                    raise ValueError(f"Page of shape {block.shape} does not fit a ({count}, {dim}) index at row {row}")
+                block = _normalize(block)
+                vectors[row:row + len(block)] = block
+                np.maximum(max_abs, np.abs(block).max(axis=0), out=max_abs)
+                page_offsets = []
+                for id_, doc, meta in zip(ids, documents, metadatas):
+                    page_offsets.append(f.tell())
+                    line = json.dumps({"id": id_, "document": doc, "metadata": meta}, ensure_ascii=False)
+                    f.write(line.encode("utf-8") + b"\n")
+                offsets[row:row + len(block)] = page_offsets
+                row += len(block)
+        if row != count:
+            raise ValueError(f"Expected {count} rows, got {row} (did the collection change during the build?)")
+
+        # pass 2: compressed codes from the on-disk vectors, BLOCK_ROWS at a time
+        if quantization == "int8":
+            scales = np.clip(max_abs / 127.0, 1e-12, None).astype(np.float32)
+            np.save(path("scales.npy"), scales)
+            codes = open_memmap(path("codes_int8.npy"), mode="w+", dtype=np.int8, shape=(count, dim))
+        else:
+            codes = open_memmap(path("codes_f16.npy"), mode="w+", dtype=np.float16, shape=(count, dim))
+        bits = open_memmap(path("codes_bits.npy"), mode="w+", dtype=np.uint8,
+                           shape=(count, (dim + 7) // 8)) if binary else None
+        for start in range(0, count, BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + BLOCK_ROWS])
+            if quantization == "int8":
+                codes[start:start + len(block)] = np.clip(np.round(block / scales), -127, 127).astype(np.int8)
+            else:
+                codes[start:start + len(block)] = block.astype(np.float16)
+            if bits is not None:
+                bits[start:start + len(block)] = np.packbits(block > 0, axis=1)
+        for array in (vectors, offsets, codes, bits):
+            if array is not None:
+                array.flush()
+        del vectors, offsets, codes, bits  # close the mappings before the directory is swapped
+
+        with open(path("index.json"), "w", encoding="utf-8") as f:
+            json.dump({"quantization": quantization, "binary": binary, "count": count, "dim": dim}, f)
+
+    # -------------------------------
+    #   Search
+    # -------------------------------
+
+    def _hamming_candidates(self, q: np.ndarray, n: int) -> np.ndarray:
+        q_bits = np.packbits(q > 0)
+        dist = np.empty(len(self), dtype=np.int32)
+        for start in range(0, len(self), BLOCK_ROWS):
+            block = np.asarray(self.bits[start:start + BLOCK_ROWS])
+            dist[start:start + len(block)] = _POPCOUNT[np.bitwise_xor(block, q_bits)].sum(axis=1)
+        return _top(-dist.astype(np.float32), n)
+
+    def _approx_scores(self, q: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Dot products from the compressed codes, for the given (sorted) rows or all rows."""
+        weights = q * self.scales if self.scales is not None else q
+        if rows is not None:
+            return np.asarray(self.codes[rows], dtype=np.float32) @ weights
+        scores = np.empty(len(self), dtype=np.float32)
+        for start in range(0, len(self), BLOCK_ROWS):
+            block = np.asarray(self.codes[start:start + BLOCK_ROWS], dtype=np.float32)
+            scores[start:start + len(block)] = block @ weights
+        return scores
+
+    def search(self, query_embedding, k: int = 3):
+        """Return (row indices, cosine distances) of the k nearest vectors, best first."""
+        q = _normalize(np.asarray(query_embedding, dtype=np.float32))
+        k = min(k, len(self))
+        n_rescore = min(len(self), k * self.rescore_factor)
+
+        rows = None
+        if self.bits is not None:
+            # sorted rows make the memory-mapped reads sequential
+            rows = np.sort(self._hamming_candidates(q, min(len(self), n_rescore * self.binary_factor)))
+        scores = self._approx_scores(q, rows)
+        best = _top(scores, n_rescore)
+        candidates = rows[best] if rows is not None else best
+
+        # full-precision rescoring touches only n_rescore rows of the float32 file
+        order = np.sort(candidates)
+        exact = np.asarray(self.vectors[order]) @ q
+        top = _top(exact, k)
+        return order[top], 1.0 - exact[top]
+
+    def _record(self, row: int) -> Dict[str, Any]:
+        with self._docs_lock:
+            self._docs.seek(int(self.offsets[row]))
+            line = self._docs.readline()
+        return json.loads(line)
+
+    @staticmethod
+    def _matches(metadata: Dict[str, Any], where: Dict[str, Any]) -> bool:
+        """Equality and {"$in": [...]} conditions, the subset of Chroma's where syntax used here."""
+        for key, cond in where.items():
+            value = metadata.get(key)
+            if isinstance(cond, dict) and "$in" in cond:
+                if value not in cond["$in"]:
+                    return False
+            elif value != cond:
+                return False
+        return True
+
+    def query(self, query_embeddings: List[List[float]], n_results: int = 3,
+              where: Optional[Dict[str, Any]] = None) -> Dict[str, List[list]]:
+        """
+        Chroma-compatible query(): ids, documents, metadatas, distances (one list per query).
+        A where filter is applied after search to a widened candidate set, so very selective
+        filters can return fewer than n_results.
+        """
+        out = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for emb in query_embeddings:
+            if where:
+                rows, distances = self.search(emb, k=n_results * WHERE_OVERFETCH)
+                hits = [(self._record(r), d) for r, d in zip(rows, distances)]
+                hits = [(rec, d) for rec, d in hits if self._matches(rec["metadata"], where)][:n_results]
+            else:
+                rows, distances = self.search(emb, k=n_results)
+                hits = [(self._record(r), d) for r, d in zip(rows, distances)]
+            records = [rec for rec, _ in hits]
+            distances = [d for _, d in hits]
+            out["ids"].append([r["id"] for r in records])
+            out["documents"].append([r["document"] for r in records])
+            out["metadatas"].append([r["metadata"] for r in records])
+            out["distances"].append([float(d) for d in distances])
+        return out
+
+    def memory_report(self) -> Dict[str, int]:
+        """Bytes per representation (what a query node must keep hot vs. leave on disk)."""
+        report = {"float32_full": self.vectors.nbytes, f"{self.quantization}_codes": self.codes.nbytes}
+        if self.bits is not None:
+            report["binary_codes"] = self.bits.nbytes
+        return report
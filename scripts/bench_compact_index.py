@@ -0,0 +1,119 @@
+"""
+Memory saved and recall@k lost by the compact vector index, versus exact search and Chroma.
+
+For each variant (int8 / float16, with or without binary first pass) reports:
+  - hot_mb:  codes scanned in full on every query, i.e. what a query node keeps in RAM
+             (binary bits if enabled, otherwise int8/float16 codes; the rest is read per candidate)
+  - saving:  float32 size / hot size
+  - recall:  recall@k against exact float32 search
+  - overlap: recall@k against the current Chroma HNSW results (--chroma only)
+  - p50_ms:  query latency
+
+The synthetic clusters are zero-mean, which is the best case for the sign-bit (binary) pass;
+judge the binary variants on --chroma before enabling them.
+
+Usage:
+    python -m scripts.bench_compact_index --chroma            # the real medical_kb collection
+    python -m scripts.bench_compact_index --synthetic 1000000 # clustered random vectors
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from backend.metrics import percentile
+from backend.vector_store import CompactVectorStore, _normalize
+
+VARIANTS = [("int8", False), ("int8", True), ("float16", False), ("float16", True)]
+
+
+def synthetic_data(n, dim, n_queries, seed=0):
+    """Clustered unit vectors (closer to real embeddings than uniform noise)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(8, n // 250), dim))
+    vectors = _normalize(centers[rng.integers(0, len(centers), n)] + 0.6 * rng.normal(size=(n, dim)))
+    queries = _normalize(centers[rng.integers(0, len(centers), n_queries)] + 0.6 * rng.normal(size=(n_queries, dim)))
+    return vectors.astype(np.float32), queries.astype(np.float32)
+
+
+def chroma_data(n_queries, k, seed=0):
+    from backend.embeddings import get_embedder
+    from scripts.build_compact_index import export_collection
+    import chromadb
+
+    ids, embeddings, documents, _ = export_collection()
+    rng = np.random.default_rng(seed)
+    # questions made from the opening words of random chunks
+    picks = rng.choice(len(documents), size=min(n_queries, len(documents)), replace=False)
+    texts = [" ".join(documents[i].split()[:12]) for i in picks]
+    queries = np.asarray(get_embedder().encode(texts), dtype=np.float32)
+
+    collection = chromadb.PersistentClient(path="./chroma_db").get_collection("medical_kb")
+    res = collection.query(query_embeddings=queries.tolist(), n_results=k, include=[])
+    row_of = {id_: i for i, id_ in enumerate(ids)}
+    chroma_rows = [[row_of[i] for i in hit_ids] for hit_ids in res["ids"]]
+    return np.asarray(embeddings, dtype=np.float32), _normalize(queries), chroma_rows
+
+
+def recall(found, truth):
+    return float(np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chroma", action="store_true")
+    parser.add_argument("--synthetic", type=int, default=200000, help="number of synthetic vectors")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    chroma_rows = None
+    if args.chroma:
+        vectors, queries, chroma_rows = chroma_data(args.queries, args.k)
+    else:
+        vectors, queries = synthetic_data(args.synthetic, args.dim, args.queries)
+    vectors = _normalize(vectors)
+    k = min(args.k, len(vectors))
+    exact = [np.argsort(-(vectors @ q))[:k] for q in queries]
+    float32_mb = vectors.nbytes / 1e6
+
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, float32 = {float32_mb:.1f} MB, recall@{k}")
+    if chroma_rows is not None:
+        print(f"chroma HNSW recall vs exact: {recall(chroma_rows, exact):.3f}")
+    print("variant          hot_mb   saving  recall  overlap  p50_ms")
+
+    n = len(vectors)
+    for quantization, binary in VARIANTS:
+        index_dir = tempfile.mkdtemp(prefix="compact_")
+        try:
+            CompactVectorStore.build(index_dir, [str(i) for i in range(n)], vectors, [""] * n, [{}] * n,
+                                     quantization=quantization, binary=binary)
+            store = CompactVectorStore(index_dir)
+            found, latencies = [], []
+            for q in queries:
+                t = time.perf_counter()
+                rows, _ = store.search(q, k=k)
+                latencies.append(time.perf_counter() - t)
+                found.append(rows)
+
+            report = store.memory_report()
+            # with a binary first pass only the bits are scanned in full; codes are read for candidates only
+            hot_mb = (report["binary_codes"] if binary else report[f"{quantization}_codes"]) / 1e6
+            overlap = f"{recall(found, chroma_rows):.3f}" if chroma_rows is not None else "-"
+            name = quantization + ("+binary" if binary else "")
+            print(f"{name:<16} {hot_mb:<8.1f} {float32_mb / hot_mb:<6.1f}x {recall(found, exact):<7.3f} "
+                  f"{overlap:<8} {percentile(latencies, 50) * 1000:.2f}")
+        finally:
+            shutil.rmtree(index_dir, ignore_errors=True)
+
+    if args.chroma and os.path.isdir("./chroma_db"):
+        disk = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk("./chroma_db") for f in files)
+        print(f"chroma_db on disk: {disk / 1e6:.1f} MB (float32 vectors + HNSW graph + documents)")
+
+
+if __name__ == "__main__":
+    main()
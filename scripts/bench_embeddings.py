@@ -0,0 +1,97 @@
+"""
+Benchmark the embedding backends (torch vs int8 ONNX) on CPU.
+
+Each backend runs in a fresh subprocess so import time and RSS are not shared.
+Reports: import + load time, single-query latency (p50/p90), batched throughput
+and peak RSS.
+
+Usage:
+    python -m scripts.bench_embeddings
+    python -m scripts.bench_embeddings --backends onnx --threads 1 2 4
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from backend.metrics import percentile
+
+QUERIES = [
+    "What causes fever?",
+    "What are the symptoms of diabetes?",
+    "How can I relieve a tension headache?",
+    "What is a normal blood pressure?",
+    "How long does a common cold last?",
+    "When should I see a doctor for a fever?",
+    "What foods help lower blood pressure?",
+    "Is a headache a sign of high blood pressure?",
+]
+PASSAGE = (
+    "A fever is a temporary increase in body temperature, often due to an illness. Having a fever "
+    "is a sign that something out of the ordinary is going on in your body. For an adult, a fever "
+    "may be uncomfortable, but usually isn't a cause for concern unless it reaches 103 F or higher. "
+)
+
+
+def run_child(backend, n_single, n_batch, batch_size):
+    t0 = time.perf_counter()
+    from backend.embeddings import get_embedder
+
+    embedder = get_embedder(backend)
+    load_s = time.perf_counter() - t0
+
+    embedder.encode(QUERIES[0])  # warm-up
+    latencies = []
+    for i in range(n_single):
+        t = time.perf_counter()
+        embedder.encode(QUERIES[i % len(QUERIES)])
+        latencies.append(time.perf_counter() - t)
+
+    passages = [PASSAGE * (1 + i % 3) for i in range(n_batch)]
+    t = time.perf_counter()
+    embedder.encode(passages, batch_size=batch_size)
+    batch_s = time.perf_counter() - t
+
+    return {
+        "import_load_s": round(load_s, 2),
+        "single_p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "single_p90_ms": round(percentile(latencies, 90) * 1000, 2),
+        "batch_texts_per_s": round(n_batch / batch_s, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx"])
+    parser.add_argument("--threads", nargs="+", type=int, default=[min(4, os.cpu_count() or 1)])
+    parser.add_argument("--single", type=int, default=200, help="single-query encodes")
+    parser.add_argument("--batch", type=int, default=256, help="passages in the throughput run")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.single, args.batch, args.batch_size)))
+        return
+
+    print("backend  threads  import_load_s  single_p50_ms  single_p90_ms  batch_texts_per_s  peak_rss_mb")
+    for backend in args.backends:
+        for threads in args.threads:
+            env = dict(os.environ, EMBEDDING_THREADS=str(threads), OMP_NUM_THREADS=str(threads))
+            cmd = [sys.executable, "-m", "scripts.bench_embeddings", "--child", backend,
+                   "--single", str(args.single), "--batch", str(args.batch), "--batch-size", str(args.batch_size)]
+            out = subprocess.run(cmd, env=env, capture_output=True, text=True)
+            if out.returncode != 0:
+                print(f"{backend:<8} {threads:<8} failed: {out.stderr.strip().splitlines()[-1:]}")
+                continue
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{backend:<8} {threads:<8} {r['import_load_s']:<14} {r['single_p50_ms']:<14} "
+                  f"{r['single_p90_ms']:<14} {r['batch_texts_per_s']:<18} {r['peak_rss_mb']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Latency of sharded vs single-collection retrieval as corpus size and shard count grow.
+
+Uses an in-memory Chroma client and synthetic clustered embeddings: each cluster is a
+"topic", topics are spread over the shards. For each (corpus size, shard count) reports p50
+latency of:
+  - single:   one collection with everything (current behaviour)
+  - filtered: one collection with a where={"topic": ...} pre-filter
+  - sharded:  ShardRouter (classify query -> search closest shard(s) in parallel -> merge)
+and recall@k of the sharded results against the single collection.
+
+Usage:
+    python -m scripts.bench_sharding
+    python -m scripts.bench_sharding --sizes 20000 100000 --shards 1 4 16
+"""
+import argparse
+import time
+
+import chromadb
+import numpy as np
+
+from backend.metrics import percentile
+from backend.sharding import ShardRouter, compute_centroids, shard_name
+
+ADD_BATCH = 5000
+
+
+def make_corpus(n, dim, n_topics, rng):
+    centers = rng.normal(size=(n_topics, dim))
+    topics = rng.integers(0, n_topics, n)
+    vectors = centers[topics] + 0.8 * rng.normal(size=(n, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32), topics, centers
+
+
+def add(collection, ids, vectors, metadatas):
+    for i in range(0, len(ids), ADD_BATCH):
+        collection.add(ids=ids[i:i + ADD_BATCH], embeddings=vectors[i:i + ADD_BATCH].tolist(),
+                       metadatas=metadatas[i:i + ADD_BATCH])
+
+
+def timed(fn, queries):
+    results, latencies = [], []
+    for q in queries:
+        t = time.perf_counter()
+        results.append(fn(q))
+        latencies.append(time.perf_counter() - t)
+    return results, percentile(latencies, 50) * 1000
+
+
+def run(size, n_shards, args, rng):
+    vectors, topics, centers = make_corpus(size, args.dim, args.topics, rng)
+    shard_of_topic = {t: f"s{t % n_shards}" for t in range(args.topics)}
+    ids = [str(i) for i in range(size)]
+    metadatas = [{"topic": shard_of_topic[t]} for t in topics]
+
+    client = chromadb.EphemeralClient()
+    for col in client.list_collections():  # ephemeral clients share state within the process
+        client.delete_collection(getattr(col, "name", col))
+    single = client.create_collection("single", metadata={"hnsw:space": "cosine"})
+    add(single, ids, vectors, metadatas)
+
+    by_shard = {}
+    for i, meta in enumerate(metadatas):
+        by_shard.setdefault(meta["topic"], []).append(i)
+    for shard, rows in by_shard.items():
+        col = client.create_collection(shard_name(shard), metadata={"hnsw:space": "cosine"})
+        add(col, [ids[r] for r in rows], vectors[rows], [metadatas[r] for r in rows])
+    centroids = compute_centroids({shard: vectors[rows] for shard, rows in by_shard.items()})
+    router = ShardRouter(client, centroids=centroids, max_shards=args.max_shards)
+
+    q_topics = rng.integers(0, args.topics, args.queries)
+    queries = centers[q_topics] + 0.8 * rng.normal(size=(args.queries, args.dim))
+    queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).tolist()
+    k = args.k
+
+    base, single_ms = timed(lambda q: single.query(query_embeddings=[q], n_results=k)["ids"][0], queries)
+    _, filtered_ms = timed(lambda q: single.query(query_embeddings=[q], n_results=k,
+                                                  where={"topic": router.route(q)[0]})["ids"][0], queries)
+    sharded, sharded_ms = timed(lambda q: router.query(query_embeddings=[q], n_results=k)["ids"][0], queries)
+    recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(base, sharded)])
+
+    print(f"{size:<9} {n_shards:<7} {single_ms:<10.2f} {filtered_ms:<12.2f} {sharded_ms:<11.2f} {recall:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10000, 50000])
+    parser.add_argument("--shards", nargs="+", type=int, default=[1, 2, 5, 10])
+    parser.add_argument("--topics", type=int, default=20)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--max-shards", type=int, default=2)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print("size      shards  single_ms  filtered_ms  sharded_ms  sharded_recall")
+    for size in args.sizes:
+        for n_shards in args.shards:
+            run(size, n_shards, args, rng)
+
+
+if __name__ == "__main__":
+    main()
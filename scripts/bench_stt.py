@@ -0,0 +1,133 @@
+"""
+Benchmark speech-to-text backends on the bundled medical-vocabulary clips.
+
+Reports, per backend:
+  - real-time factor (processing seconds / audio seconds, lower is better)
+  - word error rate against the reference transcripts in data/stt_clips/manifest.json
+
+Usage:
+    python -m scripts.bench_stt                      # local backend
+    python -m scripts.bench_stt --backends local google
+    python -m scripts.bench_stt --synthesize         # (re)generate clips offline with pyttsx3
+"""
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.stt import get_stt_backend, wav_duration, TranscriptionError
+
+CLIPS_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "stt_clips")
+MANIFEST = os.path.join(CLIPS_DIR, "manifest.json")
+
+
+def load_manifest():
+    with open(MANIFEST, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def synthesize_clips(entries):
+    """Render each reference sentence to a 16 kHz mono wav with the offline TTS engine."""
+    import pyttsx3
+    from pydub import AudioSegment
+
+    engine = pyttsx3.init()
+    raw_paths = []
+    for e in entries:
+        raw = os.path.join(CLIPS_DIR, "raw_" + e["file"])
+        engine.save_to_file(e["text"], raw)
+        raw_paths.append((raw, os.path.join(CLIPS_DIR, e["file"])))
+    engine.runAndWait()
+
+    for raw, out in raw_paths:
+        AudioSegment.from_file(raw).set_frame_rate(16000).set_channels(1).set_sample_width(2).export(out, format="wav")
+        os.remove(raw)
+    print(f"Synthesized {len(raw_paths)} clips into {CLIPS_DIR}")
+
+
+def normalize(text):
+    return re.sub(r"[^a-z0-9 ]", " ", text.lower()).split()
+
+
+def word_errors(ref, hyp):
+    """Levenshtein distance over words."""
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        cur = [i]
+        for j, h in enumerate(hyp, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h)))
+        prev = cur
+    return prev[-1]
+
+
+def bench_backend(name, entries):
+    backend = get_stt_backend(name)
+    paths = [os.path.join(CLIPS_DIR, e["file"]) for e in entries]
+
+    # warm-up (model load is a one-time cost, not part of the RTF)
+    t0 = time.perf_counter()
+    try:
+        backend.transcribe(paths[0])
+    except TranscriptionError:
+        pass
+    load_s = time.perf_counter() - t0
+
+    audio_s = proc_s = 0.0
+    errors = ref_words = 0
+    for e, path in zip(entries, paths):
+        t0 = time.perf_counter()
+        try:
+            hyp = backend.transcribe(path)
+        except TranscriptionError:
+            hyp = ""
+        proc_s += time.perf_counter() - t0
+        audio_s += wav_duration(path)
+
+        ref = normalize(e["text"])
+        errors += word_errors(ref, normalize(hyp))
+        ref_words += len(ref)
+        print(f"  [{name}] {e['file']}: {hyp!r}")
+
+    # concurrent requests go through the batcher
+    def transcribe_or_empty(path):
+        try:
+            return backend.transcribe(path)
+        except TranscriptionError:
+            return ""
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(paths)) as pool:
+        list(pool.map(transcribe_or_empty, paths))
+    batch_s = time.perf_counter() - t0
+
+    return {
+        "backend": name,
+        "first_call_s": round(load_s, 2),
+        "rtf": round(proc_s / audio_s, 3),
+        "rtf_batched": round(batch_s / audio_s, 3),
+        "wer": round(errors / max(ref_words, 1), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["local"])
+    parser.add_argument("--synthesize", action="store_true", help="generate the clips before benchmarking")
+    args = parser.parse_args()
+
+    entries = load_manifest()
+    missing = [e["file"] for e in entries if not os.path.exists(os.path.join(CLIPS_DIR, e["file"]))]
+    if args.synthesize or missing:
+        synthesize_clips(entries)
+
+    results = [bench_backend(name, entries) for name in args.backends]
+
+    print("\nbackend   first_call_s   rtf     rtf_batched   wer")
+    for r in results:
+        print(f"{r['backend']:<9} {r['first_call_s']:<14} {r['rtf']:<7} {r['rtf_batched']:<13} {r['wer']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Measure time-from-question-to-first-audio for spoken answers.
+
+Compares three paths:
+  - whole:     wait for the full answer, then synthesize it in one go
+  - streaming: SpeechSession, speaking sentence by sentence while the answer streams
+  - cached:    the same answer again, served from the audio cache
+
+By default the LLM is simulated (a fixed answer streamed at --tokens-per-s) so the
+numbers only reflect the TTS path. Use --live to go through the real RAG pipeline.
+Audio is not played; "first audio" is the moment the first clip is ready to play.
+
+Usage:
+    python -m scripts.bench_tts
+    python -m scripts.bench_tts --live --question "What causes fever?"
+"""
+import argparse
+import time
+
+from backend.tts import SpeechSession, synthesize_wav
+
+SAMPLE_ANSWER = (
+    "A fever is a temporary rise in body temperature, usually caused by an infection. "
+    "Most fevers in adults are not dangerous and go away within a few days. "
+    "Rest, fluids and over-the-counter medicines such as paracetamol can ease the discomfort. "
+    "Seek medical care if the temperature goes above 103 F or lasts longer than three days. "
+    "This is not a diagnosis; please consult a medical professional."
+)
+
+
+def simulated_stream(text, tokens_per_s):
+    delay = 1.0 / tokens_per_s
+    for word in text.split(" "):
+        time.sleep(delay)
+        yield word + " "
+
+
+def no_play(_clip):
+    pass
+
+
+def bench_whole(chunks):
+    t0 = time.perf_counter()
+    answer = "".join(chunks)
+    synthesize_wav(answer)
+    return time.perf_counter() - t0
+
+
+def bench_streaming(make_stream, answer=None):
+    t0 = time.perf_counter()
+    chunks = make_stream()
+    speech = SpeechSession(answer=answer, started_at=t0, play=no_play)
+    for _ in speech.wrap(chunks):
+        pass
+    return speech.first_audio_s, speech.from_cache, speech.text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live", action="store_true", help="use the real retrieval + Groq stream")
+    parser.add_argument("--question", default="What causes fever and when should I see a doctor?")
+    parser.add_argument("--tokens-per-s", type=float, default=40.0)
+    args = parser.parse_args()
+
+    if args.live:
+        from backend.cache_singleton import cache
+        from backend.rag import stream_answer_with_cache
+
+        def make_stream():
+            # each run must generate: otherwise the previous run's answer comes back as one cached chunk
+            cache.clear()
+            return stream_answer_with_cache(args.question)["stream"]
+    else:
+        def make_stream():
+            return simulated_stream(SAMPLE_ANSWER, args.tokens_per_s)
+
+    # warm up the engine in the worker processes so process start-up isn't measured
+    bench_streaming(lambda: iter(["Warm up sentence for the speech engine."]))
+
+    whole = bench_whole(make_stream())
+    streaming, _, answer = bench_streaming(make_stream)
+    # a cached answer arrives as one chunk whose text is known up front
+    cached, from_cache, _ = bench_streaming(lambda: iter([answer]), answer)
+
+    print("path        time_to_first_audio_s")
+    print(f"whole       {whole:.3f}")
+    print(f"streaming   {streaming:.3f}")
+    print(f"cached      {cached:.3f}{'' if from_cache else '  (cache miss!)'}")
+
+
+if __name__ == "__main__":
+    main()
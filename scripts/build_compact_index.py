@@ -0,0 +1,83 @@
+"""
+Build the compact vector index (backend/vector_store.py) from the medical_kb Chroma collection.
+
+Usage:
+    python -m scripts.build_compact_index                       # int8 codes + binary codes
+    python -m scripts.build_compact_index --quantization float16 --no-binary
+    VECTOR_STORE=compact streamlit run app.py
+"""
+import argparse
+import json
+import os
+
+import chromadb
+
+from backend.vector_store import COMPACT_INDEX_DIR, CompactVectorStore
+
+PAGE_SIZE = 5000
+
+
+def collection_pages(collection, page_size=PAGE_SIZE):
+    """(ids, embeddings, documents, metadatas) of a collection, one page at a time."""
+    for offset in range(0, collection.count(), page_size):
+        page = collection.get(include=["embeddings", "documents", "metadatas"], limit=page_size, offset=offset)
+        yield page["ids"], page["embeddings"], page["documents"], page["metadatas"]
+
+
+def export_collection(path="./chroma_db", name="medical_kb"):
+    """All (ids, embeddings, documents, metadatas) of a collection, in memory (for benchmarks)."""
+    collection = chromadb.PersistentClient(path=path).get_collection(name)
+    ids, embeddings, documents, metadatas = [], [], [], []
+    for page_ids, page_embeddings, page_documents, page_metadatas in collection_pages(collection):
+        ids += page_ids
+        embeddings += list(page_embeddings)
+        documents += page_documents
+        metadatas += page_metadatas
+    return ids, embeddings, documents, metadatas
+
+
+def build_from_collection(out_dir, quantization="int8", binary=True, path="./chroma_db", name="medical_kb"):
+    """
+    Stream a collection into a compact index without holding it in memory.
+    Returns the number of chunks indexed (0 for an empty collection, which leaves out_dir untouched).
+    """
+    collection = chromadb.PersistentClient(path=path).get_collection(name)
+    count = collection.count()
+    if count == 0:
+        return 0
+    dim = len(collection.get(include=["embeddings"], limit=1)["embeddings"][0])
+    CompactVectorStore.build_from_pages(out_dir, collection_pages(collection), count, dim,
+                                        quantization=quantization, binary=binary)
+    return count
+
+
+def rebuild_compact_index(index_dir=COMPACT_INDEX_DIR, chroma_path="./chroma_db"):
+    """
+    Rebuild an existing compact index from the current collection, keeping its settings.
+    Returns the number of chunks indexed, or None if there is no index to rebuild (or nothing to index).
+    """
+    config_path = os.path.join(index_dir, "index.json")
+    if not os.path.exists(config_path):
+        return None
+    with open(config_path, encoding="utf-8") as f:
+        config = json.load(f)
+    count = build_from_collection(index_dir, quantization=config["quantization"], binary=config["binary"],
+                                  path=chroma_path)
+    return count or None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out-dir", default=COMPACT_INDEX_DIR)
+    parser.add_argument("--quantization", choices=["int8", "float16"], default="int8")
+    parser.add_argument("--no-binary", action="store_true")
+    args = parser.parse_args()
+
+    if not build_from_collection(args.out_dir, quantization=args.quantization, binary=not args.no_binary):
+        raise SystemExit("The medical_kb collection is empty; run python -m scripts.ingest first.")
+    store = CompactVectorStore(args.out_dir)
+    print(f"Indexed {len(store)} chunks into {args.out_dir}: {store.memory_report()}")
+
+
+if __name__ == "__main__":
+    main()
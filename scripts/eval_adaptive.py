@@ -0,0 +1,123 @@
+"""
+Evaluate adaptive k / early exit (backend/adaptive.py) against fixed k retrieval.
+
+For each question in --questions (JSON lines: {"query": ..., "topic": <expected topic> or null
+for out-of-domain}) the candidates are retrieved once, then both policies pick their chunks.
+For each relevance threshold (--max-distance) reports:
+  - prompt_tok:  mean estimated prompt tokens, fixed -> adaptive (skipped questions count as 0)
+  - saved:       prompt tokens saved by the adaptive policy
+  - llm_calls:   LLM calls made by the adaptive policy (fixed k always calls it)
+  - ood_skip:    out-of-domain questions answered without the LLM (higher is better)
+  - false_skip:  in-domain questions wrongly answered without the LLM (lower is better)
+  - topic_hit:   in-domain questions with a chunk from the expected topic, fixed -> adaptive
+  - grounded:    (--generate only) in-domain answers whose content words mostly appear
+                 in the retrieved context, fixed -> adaptive
+
+Usage:
+    python -m scripts.eval_adaptive
+    python -m scripts.eval_adaptive --max-distance 0.6 0.7 0.8 --generate
+"""
+import argparse
+import json
+import re
+from collections import Counter
+
+from backend import rag
+from backend.adaptive import AdaptivePolicy, RELEVANCE_MAX_DISTANCE
+from backend.conversation import estimate_tokens
+from backend.groq_client import groq_generate
+
+GROUNDED_MIN = 0.6  # share of an answer's content words that must appear in the context
+STOPWORDS = set("""
+a an and are as at be been but by can do does for from has have how if in into is it its may more
+most not of on or other should such than that the their them there these they this to was were what
+when which while who will with you your also some any many much often very
+""".split())
+
+
+def load_questions(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def content_words(text):
+    return {w for w in re.findall(r"[a-z]{4,}", text.lower()) if w not in STOPWORDS}
+
+
+def grounding(answer, context):
+    words = content_words(answer)
+    if not words:
+        return 0.0
+    return len(words & content_words(context)) / len(words)
+
+
+def topic_hit(metadatas, topic):
+    return any(m.get("topic") == topic for m in metadatas)
+
+
+def evaluate(questions, candidates, k, policy, generate):
+    rows = {"fixed_tok": 0, "adaptive_tok": 0, "llm_calls": 0, "ood": 0, "ood_skip": 0, "in": 0,
+            "false_skip": 0, "fixed_hit": 0, "adaptive_hit": 0, "fixed_grounded": 0, "adaptive_grounded": 0}
+    reasons = Counter()
+    for q, (documents, metadatas, distances) in zip(questions, candidates):
+        query, topic = q["query"], q.get("topic")
+        fixed_context = "\n\n".join(documents[:k])
+        n, reason = policy.choose(distances, k)
+        reasons[reason] += 1
+        adaptive_context = "\n\n".join(documents[:n])
+
+        rows["fixed_tok"] += estimate_tokens(rag.build_prompt(fixed_context, query))
+        if n:
+            rows["adaptive_tok"] += estimate_tokens(rag.build_prompt(adaptive_context, query))
+            rows["llm_calls"] += 1
+
+        if topic is None:
+            rows["ood"] += 1
+            rows["ood_skip"] += n == 0
+            continue
+        rows["in"] += 1
+        rows["false_skip"] += n == 0
+        rows["fixed_hit"] += topic_hit(metadatas[:k], topic)
+        rows["adaptive_hit"] += topic_hit(metadatas[:n], topic)
+        if generate:
+            fixed_answer = groq_generate(rag.build_prompt(fixed_context, query))
+            rows["fixed_grounded"] += grounding(fixed_answer, fixed_context) >= GROUNDED_MIN
+            if n:
+                adaptive_answer = fixed_answer if n == k else groq_generate(rag.build_prompt(adaptive_context, query))
+                rows["adaptive_grounded"] += grounding(adaptive_answer, adaptive_context) >= GROUNDED_MIN
+    return rows, reasons
+
+
+def pct(part, whole):
+    return f"{100 * part / whole:.0f}%" if whole else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", default="data/adaptive_eval.jsonl")
+    parser.add_argument("--k", type=int, default=3, help="fixed k (and the adaptive default)")
+    parser.add_argument("--max-distance", nargs="+", type=float, default=[RELEVANCE_MAX_DISTANCE])
+    parser.add_argument("--generate", action="store_true", help="call the LLM to measure answer grounding")
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions)
+    fetch_k = AdaptivePolicy().fetch_k(args.k)
+    candidates = [rag.retrieve_chunks(q["query"], k=fetch_k) for q in questions]
+
+    print(f"{len(questions)} questions, fixed k={args.k}, up to {fetch_k} candidates")
+    print("max_dist  prompt_tok      saved  llm_calls  ood_skip  false_skip  topic_hit      grounded       reasons")
+    for max_distance in args.max_distance:
+        policy = AdaptivePolicy(max_distance=max_distance)
+        r, reasons = evaluate(questions, candidates, args.k, policy, args.generate)
+        n = len(questions)
+        tokens = f"{r['fixed_tok'] / n:.0f} -> {r['adaptive_tok'] / n:.0f}"
+        hits = f"{pct(r['fixed_hit'], r['in'])} -> {pct(r['adaptive_hit'], r['in'])}"
+        grounded = f"{pct(r['fixed_grounded'], r['in'])} -> {pct(r['adaptive_grounded'], r['in'])}" \
+            if args.generate else "-"
+        print(f"{max_distance:<9.2f} {tokens:<15} {pct(r['fixed_tok'] - r['adaptive_tok'], r['fixed_tok']):<6} "
+              f"{r['llm_calls']:>3}/{n:<6} {pct(r['ood_skip'], r['ood']):<9} {pct(r['false_skip'], r['in']):<11} "
+              f"{hits:<14} {grounded:<14} {dict(reasons)}")
+
+
+if __name__ == "__main__":
+    main()
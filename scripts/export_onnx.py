@@ -0,0 +1,101 @@
+"""
+Export all-MiniLM-L6-v2 to ONNX, quantize it to int8 and check it against PyTorch.
+
+Writes into ONNX_MODEL_DIR (default ./models/all-MiniLM-L6-v2-onnx):
+  model.onnx        float32 export
+  model_int8.onnx   dynamic int8 quantization (weights int8, activations quantized at run time)
+  tokenizer.json
+
+The export fails (exit code 1) if any test sentence has cosine < --min-cosine
+between the int8 ONNX vector and the SentenceTransformer reference.
+
+Usage:
+    python -m scripts.export_onnx
+    EMBEDDING_BACKEND=onnx streamlit run app.py
+"""
+import argparse
+import os
+import sys
+
+from backend.embeddings import EMBEDDING_MODEL, ONNX_MODEL_DIR, OnnxEmbedder, load_torch_embedder
+
+VALIDATION_SENTENCES = [
+    "What causes fever?",
+    "What are the early symptoms of type 2 diabetes?",
+    "How can I relieve a tension headache at home?",
+    "Is a blood pressure of 140/90 considered hypertension?",
+    "How long does a common cold usually last in adults?",
+    "A fever is a temporary increase in body temperature, often due to an illness. "
+    "Having a fever is a sign that something out of the ordinary is going on in your body.",
+    "Metformin lowers blood glucose by reducing glucose production in the liver.",
+    "Seek immediate medical care for chest pain, shortness of breath or sudden weakness.",
+]
+
+
+def export(out_dir, opset):
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    name = f"sentence-transformers/{EMBEDDING_MODEL}"
+    tokenizer = AutoTokenizer.from_pretrained(name)
+    model = AutoModel.from_pretrained(name).eval()
+
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer.save_pretrained(out_dir)  # writes tokenizer.json (fast tokenizer)
+
+    sample = tokenizer(["an example sentence"], return_tensors="pt")
+    fp32_path = os.path.join(out_dir, "model.onnx")
+    dynamic = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={"input_ids": dynamic, "attention_mask": dynamic,
+                          "token_type_ids": dynamic, "last_hidden_state": dynamic},
+            opset_version=opset,
+        )
+    return fp32_path
+
+
+def quantize(fp32_path, out_dir):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    int8_path = os.path.join(out_dir, "model_int8.onnx")
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    return int8_path
+
+
+def validate(out_dir, min_cosine):
+    import numpy as np
+
+    reference = load_torch_embedder().encode(VALIDATION_SENTENCES, normalize_embeddings=True)
+    ok = True
+    for model_file in ("model.onnx", "model_int8.onnx"):
+        vectors = OnnxEmbedder(model_dir=out_dir, model_file=model_file).encode(VALIDATION_SENTENCES)
+        cosines = (reference * vectors).sum(axis=1)  # both sides are L2-normalized
+        worst = float(np.min(cosines))
+        print(f"{model_file:<16} min cosine {worst:.4f}  mean {float(np.mean(cosines)):.4f}")
+        ok = ok and worst >= min_cosine
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out-dir", default=ONNX_MODEL_DIR)
+    parser.add_argument("--opset", type=int, default=14)
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    args = parser.parse_args()
+
+    fp32_path = export(args.out_dir, args.opset)
+    quantize(fp32_path, args.out_dir)
+    if not validate(args.out_dir, args.min_cosine):
+        print(f"Validation failed: cosine below {args.min_cosine}")
+        sys.exit(1)
+    print(f"ONNX models written to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
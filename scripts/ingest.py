@@ -1,19 +1,27 @@
 import requests
 from bs4 import BeautifulSoup
-from sentence_transformers import SentenceTransformer
 import chromadb
-import uuid
+import hashlib
 import re
+from datetime import date
+
+from backend.answer_store import bump_kb_version
+from backend.embeddings import get_embedder
+from backend.sharding import save_centroids, shard_centroids, shard_name
+from scripts.build_compact_index import rebuild_compact_index
 
 # -------- STEP 1: Define Medical Article Sources --------
 
-URLS = [
-    "https://www.medicalnewstoday.com/articles/150999",   # Fever
-    "https://www.medicalnewstoday.com/articles/323627",   # Diabetes
-    "https://www.medicalnewstoday.com/articles/73936",    # Headache
-    "https://www.medicalnewstoday.com/articles/318716",   # High blood pressure
-    "https://www.medicalnewstoday.com/articles/166606"    # Common cold
-]
+# url -> topic (topics name the per-topic shard collections)
+URL_TOPICS = {
+    "https://www.medicalnewstoday.com/articles/150999": "fever",
+    "https://www.medicalnewstoday.com/articles/323627": "diabetes",
+    "https://www.medicalnewstoday.com/articles/73936": "headache",
+    "https://www.medicalnewstoday.com/articles/318716": "blood_pressure",
+    "https://www.medicalnewstoday.com/articles/166606": "common_cold",
+}
+
+URLS = list(URL_TOPICS)
 
 
 # -------- STEP 2: Clean text function --------
@@ -24,20 +32,39 @@ def clean_text(text):
     return text.strip()
 
 
-# -------- STEP 3: Scrape Article Paragraphs --------
+# -------- STEP 3: Scrape Article Sections --------
 
-def scrape_article(url):
+def scrape_sections(url):
+    """
+    Return ([(section heading, text), ...], published date or "") for an article.
+    Paragraphs before the first heading go into an "Overview" section.
+    """
     print(f"Scraping: {url}")
     try:
         response = requests.get(url, timeout=10)
         soup = BeautifulSoup(response.text, "html.parser")
-        paragraphs = soup.find_all("p")
-
-        combined = " ".join([p.get_text() for p in paragraphs])
-        return clean_text(combined)
     except Exception as e:
         print(f"Error scraping {url}: {e}")
-        return ""
+        return [], ""
+
+    published = ""
+    meta = soup.find("meta", attrs={"property": "article:published_time"})
+    if meta and meta.get("content"):
+        published = meta["content"][:10]
+    elif soup.find("time", attrs={"datetime": True}):
+        published = soup.find("time", attrs={"datetime": True})["datetime"][:10]
+
+    sections, heading, paragraphs = [], "Overview", []
+    for tag in soup.find_all(["h2", "h3", "p"]):
+        if tag.name == "p":
+            paragraphs.append(tag.get_text())
+            continue
+        if paragraphs:
+            sections.append((heading, clean_text(" ".join(paragraphs))))
+        heading, paragraphs = clean_text(tag.get_text()) or heading, []
+    if paragraphs:
+        sections.append((heading, clean_text(" ".join(paragraphs))))
+    return sections, published
 
 
 # -------- STEP 4: Chunking Function --------
@@ -55,33 +82,63 @@ def chunk_text(text, chunk_size=800, overlap=200):
 
 # -------- STEP 5: Embeddings + ChromaDB --------
 
-def ingest_documents():
-    model = SentenceTransformer("all-MiniLM-L6-v2")
-    
-    chroma_client = chromadb.PersistentClient(path="./chroma_db")
-    collection = chroma_client.get_or_create_collection(
-        name="medical_kb",
+def get_collection(chroma_client, name):
+    return chroma_client.get_or_create_collection(
+        name=name,
         metadata={"hnsw:space": "cosine"}
     )
 
-    for url in URLS:
-        text = scrape_article(url)
-        if len(text) < 500:
-            print(f"Skipping {url} (content too short)")
-            continue
 
-        chunks = chunk_text(text)
+def chunk_id(url, section, index):
+    """Stable id: re-ingesting an article updates its chunks instead of duplicating them."""
+    return hashlib.sha256(f"{url}\n{section}\n{index}".encode("utf-8")).hexdigest()[:32]
 
-        for chunk in chunks:
-            embedding = model.encode(chunk).tolist()
-            uid = str(uuid.uuid4())
 
-            collection.add(
-                ids=[uid],
-                embeddings=[embedding],
-                documents=[chunk],
-                metadatas=[{"source": url}]
-            )
+def ingest_documents():
+    model = get_embedder()
+
+    chroma_client = chromadb.PersistentClient(path="./chroma_db")
+    collection = get_collection(chroma_client, "medical_kb")
+    ingested = date.today().isoformat()
+
+    for url, topic in URL_TOPICS.items():
+        sections, published = scrape_sections(url)
+        if sum(len(text) for _, text in sections) < 500:
+            print(f"Skipping {url} (content too short)")
+            continue
+
+        chunks, metadatas, ids = [], [], []
+        for section, text in sections:
+            for chunk in chunk_text(text):
+                # numbered across the article, so repeated headings can't produce the same id
+                ids.append(chunk_id(url, section, len(chunks)))
+                chunks.append(chunk)
+                metadatas.append({"source": url, "topic": topic, "section": section,
+                                  "published": published, "ingested": ingested})
+
+        # one batched encode and one upsert per article
+        embeddings = model.encode(chunks).tolist()
+
+        # full collection (unsharded retrieval) + per-topic shard
+        for target in (collection, get_collection(chroma_client, shard_name(topic))):
+            target.upsert(ids=ids, embeddings=embeddings, documents=chunks, metadatas=metadatas)
+            # chunks of an earlier version of the article that no longer exist
+            stale = set(target.get(where={"source": url}, include=[])["ids"]) - set(ids)
+            if stale:
+                target.delete(ids=list(stale))
+
+    # topic centroids used by the shard router to classify queries, from every shard's current contents
+    # (an article that failed to scrape this time keeps its shard routable)
+    save_centroids(shard_centroids(chroma_client))
+
+    # the compact index (VECTOR_STORE=compact) is a snapshot: rebuild it before announcing the change,
+    # so the answer-store refresh re-retrieves from the new chunks
+    rebuilt = rebuild_compact_index()
+    if rebuilt is not None:
+        print(f"Rebuilt compact index ({rebuilt} chunks)")
+
+    # lets running apps know that precomputed answers may be stale
+    bump_kb_version()
 
     print("\nIngestion Complete! ChromaDB is ready.")
 
@@ -0,0 +1,116 @@
+"""
+Load test for the HTTP API (backend/api.py).
+
+Sends POST /ask requests from --concurrency threads and reports throughput,
+latency percentiles and status codes (429 = rejected by backpressure).
+
+With --spawn, the script starts the server itself with the LLM stubbed out
+(LLM_BACKEND=stub), so the numbers measure the service, not Groq:
+    python -m scripts.load_test --spawn --workers 4 --concurrency 32 --requests 2000
+
+Against an already running server:
+    python -m scripts.load_test --url http://localhost:8000 --concurrency 16
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.metrics import summarize_latencies
+
+QUESTIONS = [
+    "What causes fever?",
+    "What are the symptoms of diabetes?",
+    "How can I relieve a tension headache?",
+    "What is a normal blood pressure?",
+    "How long does a common cold last?",
+    "When should I see a doctor for a fever?",
+    "What foods help lower blood pressure?",
+    "Is a headache a sign of high blood pressure?",
+]
+
+
+def post(url, payload, timeout):
+    data = json.dumps(payload).encode("utf-8")
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            resp.read()
+            status = resp.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = 0  # connection error / client timeout
+    return status, time.perf_counter() - start
+
+
+def wait_healthy(base_url, timeout=120):
+    end = time.time() + timeout
+    while time.time() < end:
+        try:
+            with urllib.request.urlopen(base_url + "/health", timeout=2) as resp:
+                if resp.status == 200:
+                    return
+        except Exception:
+            time.sleep(0.5)
+    raise RuntimeError(f"Server at {base_url} did not become healthy")
+
+
+def spawn_server(port, workers, stub_latency):
+    env = dict(os.environ, LLM_BACKEND="stub", LLM_STUB_LATENCY_S=str(stub_latency))
+    cmd = [sys.executable, "-m", "uvicorn", "backend.api:app",
+           "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    return subprocess.Popen(cmd, env=env)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--spawn", action="store_true", help="start a stubbed-LLM server for the test")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--stub-latency", type=float, default=0.5)
+    parser.add_argument("--unique", action="store_true", help="make every query unique (defeats the cache)")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        port = int(args.url.rsplit(":", 1)[-1])
+        server = spawn_server(port, args.workers, args.stub_latency)
+    try:
+        wait_healthy(args.url)
+
+        def one(i):
+            q = QUESTIONS[i % len(QUESTIONS)]
+            if args.unique:
+                q = f"{q} (#{i})"
+            return post(args.url + "/ask", {"query": q}, args.timeout)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(one, range(args.requests)))
+        elapsed = time.perf_counter() - start
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    statuses = Counter(s for s, _ in results)
+    ok = [lat for s, lat in results if s == 200]
+    print(f"requests:    {args.requests} in {elapsed:.2f}s (concurrency {args.concurrency})")
+    print(f"throughput:  {len(ok) / elapsed:.1f} successful req/s, {args.requests / elapsed:.1f} total req/s")
+    print(f"status:      {dict(statuses)}")
+    print(f"latency ok:  {summarize_latencies(ok)}")
+
+
+if __name__ == "__main__":
+    main()
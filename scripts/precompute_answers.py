@@ -0,0 +1,112 @@
+"""
+Precompute answers for the most frequent questions into the answer store.
+
+Questions come from (deduplicated by normalized query):
+  - seed templates for each knowledge-base topic (always, unless --no-seed)
+  - a query log: one question per line, or JSON lines with a "query" field (--log)
+  - questions generated by the LLM for each stored chunk (--per-chunk N)
+
+Usage:
+    python -m scripts.precompute_answers --log queries.log --top 300
+    python -m scripts.precompute_answers --per-chunk 2
+    python -m scripts.precompute_answers --refresh     # only regenerate answers whose chunks changed
+"""
+import argparse
+import json
+import time
+from collections import Counter
+
+from backend.answer_store import normalize_query
+from backend.groq_client import groq_generate
+from backend import rag
+
+# topics of the articles in scripts/ingest.URLS
+SEED_TOPICS = ["fever", "diabetes", "headache", "high blood pressure", "common cold"]
+SEED_TEMPLATES = [
+    "What is {t}?",
+    "What causes {t}?",
+    "What are the symptoms of {t}?",
+    "How is {t} treated?",
+    "When should I see a doctor about {t}?",
+    "How can I prevent {t}?",
+]
+
+
+def seed_questions():
+    return [tpl.format(t=topic) for topic in SEED_TOPICS for tpl in SEED_TEMPLATES]
+
+
+def mine_log(path, top):
+    """Most frequent questions in the log, grouped by normalized query (first spelling wins)."""
+    counts, spelling = Counter(), {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            query = json.loads(line).get("query", "") if line.startswith("{") else line
+            key = normalize_query(query)
+            if key:
+                counts[key] += 1
+                spelling.setdefault(key, query)
+    return [spelling[key] for key, _ in counts.most_common(top)]
+
+
+def generate_per_chunk(n):
+    """Ask the LLM for n patient questions answered by each chunk in the collection."""
+    docs = rag.collection.get(include=["documents"])["documents"]
+    questions = []
+    for doc in docs:
+        prompt = (
+            f"Write {n} short questions a patient might ask that are answered by this passage. "
+            f"One question per line, no numbering.\n\nPassage:\n{doc}\n\nQuestions:"
+        )
+        out = groq_generate(prompt, max_tokens=120, temperature=0.3)
+        if out.startswith("[Groq Error]"):
+            continue
+        questions.extend(q.strip("-• ").strip() for q in out.splitlines() if q.strip().endswith("?"))
+    return questions
+
+
+def dedupe(questions):
+    seen, unique = set(), []
+    for q in questions:
+        key = normalize_query(q)
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(q)
+    return unique
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", help="query log to mine")
+    parser.add_argument("--top", type=int, default=300, help="questions taken from the log")
+    parser.add_argument("--per-chunk", type=int, default=0, help="LLM-generated questions per chunk")
+    parser.add_argument("--no-seed", action="store_true")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=4, help="parallel LLM calls")
+    parser.add_argument("--refresh", action="store_true", help="only refresh stale entries")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = rag.init_answer_store(refresh_interval_s=0)
+    if args.refresh:
+        n = rag.refresh_answer_store(store, workers=args.workers)
+        print(f"Regenerated {n} of {len(store)} answers in {time.perf_counter() - start:.1f}s")
+        return
+
+    questions = [] if args.no_seed else seed_questions()
+    if args.log:
+        questions += mine_log(args.log, args.top)
+    if args.per_chunk:
+        questions += generate_per_chunk(args.per_chunk)
+    questions = dedupe(questions)
+
+    print(f"Precomputing {len(questions)} answers...")
+    n = rag.precompute_answers(questions, k=args.k, workers=args.workers, store=store)
+    print(f"Stored {n} answers ({len(store)} total) in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+from backend.adaptive import AdaptivePolicy
+
+POLICY = AdaptivePolicy(k_min=1, k_max=6, max_distance=0.7, confident_distance=0.3, close_margin=0.05,
+                        flat_spread=0.03)
+
+def test_no_match_skips():
+    assert POLICY.choose([0.8, 0.85, 0.9], k=3) == (0, "no_match")
+    assert POLICY.choose([], k=3) == (0, "no_match")
+
+def test_k_below_one_still_answers_relevant_hits():
+    for k in (0, -1):
+        n, reason = POLICY.choose([0.1, 0.4, 0.45], k=k)
+        assert n >= 1 and reason == "confident"
+        n, reason = POLICY.choose([0.4, 0.5, 0.6], k=k)
+        assert n >= 1 and reason != "no_match"
+    assert AdaptivePolicy(k_min=2, k_max=6).choose([0.1, 0.12, 0.13], k=1) == (2, "confident")
+
+def test_confident_keeps_close_hits_only():
+    assert POLICY.choose([0.1, 0.4, 0.45, 0.5], k=3) == (1, "confident")
+    assert POLICY.choose([0.1, 0.12, 0.4], k=3) == (2, "confident")
+
+def test_flat_scores_widen():
+    assert POLICY.choose([0.5, 0.51, 0.52, 0.52, 0.53, 0.65], k=3) == (6, "flat")
+
+def test_default_drops_irrelevant_tail():
+    assert POLICY.choose([0.4, 0.5, 0.6, 0.65], k=3) == (3, "default")
+    assert POLICY.choose([0.4, 0.5, 0.9], k=3) == (2, "default")
+
+def test_fetch_k():
+    assert POLICY.fetch_k(3) == 6
+    assert POLICY.fetch_k(10) == 10
@@ -0,0 +1,71 @@
+import sqlite3
+import time
+
+from backend import answer_store
+from backend.answer_store import AnswerStore, normalize_query, watch_kb_version
+
+def test_keys():
+    assert normalize_query("  What causes   FEVER?? ") == "what causes fever"
+
+def test_store_roundtrip(tmp_path):
+    path = str(tmp_path / "answers.db")
+    store = AnswerStore(path)
+    store.put("What causes fever?", "Infections, mostly.", [{"source": "url"}], "fp1")
+
+    assert store.get("what causes fever")["answer"] == "Infections, mostly."
+    assert store.get("How is diabetes treated?") is None
+
+    # persisted and reloaded into memory
+    again = AnswerStore(path)
+    entry = again.get("What causes fever?")
+    assert entry["sources"] == [{"source": "url"}] and entry["fingerprint"] == "fp1"
+    assert len(again) == 1
+
+def test_reordered_or_reworded_questions_do_not_match(tmp_path):
+    store = AnswerStore(str(tmp_path / "answers.db"))
+    store.put("Is a headache a sign of high blood pressure?", "Usually not.", [], "fp")
+    store.put("Can I take ibuprofen with a fever?", "Yes, usually.", [], "fp")
+
+    assert store.get("Is high blood pressure a sign of a headache?") is None
+    assert store.get("Should I take ibuprofen with a fever?") is None
+    assert store.get("Can I not take ibuprofen with a fever?") is None
+    assert store.get("can i take ibuprofen with a fever") is not None
+
+def test_refresh_claim_is_exclusive(tmp_path):
+    path = str(tmp_path / "answers.db")
+    a, b = AnswerStore(path), AnswerStore(path)
+    assert a.try_claim("refresh", "worker-a")
+    assert not b.try_claim("refresh", "worker-b")
+    a.release_claim("refresh", "worker-a")
+    assert b.try_claim("refresh", "worker-b")
+    assert a.try_claim("expired", "worker-a", lease_s=-1)
+    assert b.try_claim("expired", "worker-b")
+
+def test_reload_sees_other_process_writes(tmp_path):
+    path = str(tmp_path / "answers.db")
+    reader, writer = AnswerStore(path), AnswerStore(path)
+    assert not reader.changed_elsewhere()
+    writer.put("What causes fever?", "Infections.", [], "fp")
+    assert reader.changed_elsewhere()
+    reader.reload()
+    assert reader.get("what causes fever?")["answer"] == "Infections."
+
+def test_refresher_survives_errors(tmp_path, monkeypatch):
+    monkeypatch.setattr(answer_store, "KB_VERSION_PATH", str(tmp_path / "kb_version"))
+    answer_store.bump_kb_version()
+    store = AnswerStore(str(tmp_path / "answers.db"))
+    real_claim, failures, refreshed = store.try_claim, [], []
+
+    def flaky_claim(name, owner, lease_s=answer_store.REFRESH_LEASE_S):
+        if not failures:
+            failures.append(name)
+            raise sqlite3.OperationalError("database is locked")
+        return real_claim(name, owner, lease_s)
+
+    monkeypatch.setattr(store, "try_claim", flaky_claim)
+    watch_kb_version(store, refreshed.append, interval_s=0.01)
+    for _ in range(200):
+        if refreshed:
+            break
+        time.sleep(0.01)
+    assert failures and refreshed == [store]
@@ -0,0 +1,168 @@
+import asyncio
+import threading
+import time
+from contextlib import aclosing
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import ClientDisconnect
+
+from backend.admission import Admission, AdmittedStreamingResponse, iterate_in_thread, run_in_thread
+
+def test_admission_rejects_beyond_max_pending():
+    async def scenario():
+        admission = Admission(max_concurrency=1, max_queue=1)
+        running = await admission.acquire()
+        waiting = asyncio.ensure_future(admission.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as e:
+            await admission.acquire()
+        assert e.value.status_code == 429
+        running.release()
+        (await waiting).release()
+        assert admission.pending == 0
+    asyncio.run(scenario())
+
+def test_release_is_idempotent_and_waits_for_all_holders():
+    async def scenario():
+        admission = Admission(max_concurrency=1, max_queue=0)
+        slot = await admission.acquire()
+        slot.hold("response")
+        slot.release()
+        slot.release()
+        assert admission.pending == 1
+        slot.release("response")
+        assert admission.pending == 0 and slot.released
+    asyncio.run(scenario())
+
+def test_timed_out_work_keeps_slot_until_thread_ends():
+    async def scenario():
+        admission = Admission(max_concurrency=1, max_queue=0)
+        gate = threading.Event()
+        slot = await admission.acquire()
+        work = run_in_thread(slot, gate.wait, 5)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(asyncio.shield(work), timeout=0.05)
+        slot.release()
+        assert admission.pending == 1  # the thread is still running
+        gate.set()
+        await work
+        assert admission.pending == 0
+    asyncio.run(scenario())
+
+def test_failed_work_releases_slot():
+    def boom():
+        raise ValueError("boom")
+
+    async def scenario():
+        admission = Admission(max_concurrency=1, max_queue=0)
+        slot = await admission.acquire()
+        try:
+            with pytest.raises(ValueError):
+                await run_in_thread(slot, boom)
+        finally:
+            slot.release()
+        assert admission.pending == 0
+    asyncio.run(scenario())
+
+def test_stalled_stream_times_out_and_is_closed_when_its_read_returns():
+    gate = threading.Event()
+    closed = threading.Event()
+
+    def stream():
+        try:
+            yield "first"
+            gate.wait(5)  # the LLM stalls
+            yield "late"
+        finally:
+            closed.set()
+
+    async def scenario():
+        admission = Admission(max_concurrency=1, max_queue=0)
+        slot = await admission.acquire()
+        received = []
+        with pytest.raises(asyncio.TimeoutError):
+            async with aclosing(iterate_in_thread(slot, stream(), time.monotonic() + 0.2)) as deltas:
+                async for delta in deltas:
+                    received.append(delta)
+        assert received == ["first"]
+        slot.release()
+        assert admission.pending == 1 and not closed.is_set()  # the stalled read still runs
+        gate.set()
+        for _ in range(100):
+            if admission.pending == 0:
+                break
+            await asyncio.sleep(0.02)
+        assert admission.pending == 0 and closed.is_set()
+    asyncio.run(scenario())
+
+def test_stream_iterates_to_the_end_and_releases():
+    async def scenario():
+        admission = Admission(max_concurrency=1, max_queue=0)
+        slot = await admission.acquire()
+        async with aclosing(iterate_in_thread(slot, iter(["a", "b"]), time.monotonic() + 5)) as deltas:
+            assert [d async for d in deltas] == ["a", "b"]
+        slot.release()
+        for _ in range(100):
+            if admission.pending == 0:
+                break
+            await asyncio.sleep(0.02)
+        assert admission.pending == 0
+    asyncio.run(scenario())
+
+def test_stream_releases_slot_when_send_fails_before_body():
+    async def body():
+        yield "never sent"
+
+    async def receive():
+        await asyncio.Event().wait()
+
+    async def send(message):
+        raise OSError("client went away")
+
+    async def scenario():
+        admission = Admission(max_concurrency=1, max_queue=0)
+        response = AdmittedStreamingResponse(await admission.acquire(), body(), media_type="text/event-stream")
+        scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+        with pytest.raises(ClientDisconnect):  # Starlette's translation of the send OSError
+            await response(scope, receive, send)
+        assert admission.pending == 0
+    asyncio.run(scenario())
+
+def test_stream_releases_slot_on_early_disconnect():
+    async def body():
+        await asyncio.sleep(1)
+        yield "late"
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    async def scenario():
+        admission = Admission(max_concurrency=1, max_queue=0)
+        response = AdmittedStreamingResponse(await admission.acquire(), body(), media_type="text/event-stream")
+        await response({"type": "http", "asgi": {"spec_version": "2.0"}}, receive, send)
+        assert admission.pending == 0
+    asyncio.run(scenario())
+
+def test_ask_route_with_stub_llm(monkeypatch, tmp_path):
+    pytest.importorskip("chromadb")
+    monkeypatch.setenv("LLM_BACKEND", "stub")
+    monkeypatch.setenv("LLM_STUB_LATENCY_S", "0")
+    from fastapi.testclient import TestClient
+    from backend import api, groq_client
+
+    monkeypatch.setattr(groq_client, "client", None)
+    monkeypatch.setattr(groq_client, "LLM_STUB_LATENCY_S", 0)
+    monkeypatch.setattr(api.rag, "ANSWER_STORE_PATH", str(tmp_path / "answers.db"))
+    monkeypatch.setattr(api.rag, "ANSWER_STORE_REFRESH_S", 0)
+    with TestClient(api.app) as client:
+        res = client.post("/ask", json={"query": "What causes a fever in adults?"})
+        assert res.status_code == 200
+        assert res.json()["answer"] == groq_client.STUB_ANSWER
+        assert client.post("/ask", json={"query": "  "}).status_code == 400
+        for bad in ({"k": 0, "adaptive": True}, {"k": -1}, {"k": api.MAX_K + 1}, {"ttl_seconds": -5}):
+            assert client.post("/ask", json={"query": "What causes a fever?", **bad}).status_code == 422
+    assert api.admission.pending == 0
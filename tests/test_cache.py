@@ -10,3 +10,24 @@ def test_ttl_expiry():
     c.set("b", 2)
     import time; time.sleep(1.2)
     assert c.get("b") is None
+
+def test_concurrent_get_set():
+    import sys
+    from concurrent.futures import ThreadPoolExecutor
+
+    c = LRUCacheTTL(capacity=4, default_ttl=60)
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # switch threads as often as possible
+    try:
+        def worker(seed):
+            for i in range(5000):
+                key = str((seed + i) % 8)
+                c.set(key, i)
+                c.get(key)
+                c.get(str(i % 8))
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(worker, range(8)))  # re-raises a KeyError from any worker
+    finally:
+        sys.setswitchinterval(interval)
+    assert c.info() == (4, 4)
@@ -0,0 +1,61 @@
+from backend.conversation import ConversationMemory, estimate_tokens, needs_rewrite, rewrite_query
+
+def fake_summarize(summary, turns):
+    return (summary + " " + " ".join(t for _, t in turns)).strip()
+
+def test_memory_stays_within_budget():
+    calls = []
+    def summarize(summary, turns):
+        calls.append(len(turns))
+        return fake_summarize(summary, turns)
+
+    m = ConversationMemory(token_budget=100, max_recent_turns=4, summarize=summarize)
+    for i in range(20):
+        m.add_turn("user", f"question number {i} about fever " * 3)
+        m.add_turn("assistant", f"answer number {i} " * 10)
+        assert estimate_tokens(m.render()) <= 100
+    assert m.summary
+    # only the turns that fell out are summarized each time
+    assert all(n <= 4 for n in calls)
+
+def test_render_budget_includes_labels_and_summary_prefix():
+    for budget in (40, 100, 250):
+        m = ConversationMemory(token_budget=budget, max_recent_turns=6, summarize=fake_summarize)
+        for i in range(12):
+            m.add_turn("user", "ok " * (i % 5 + 1))
+            m.add_turn("assistant", "short reply " * (i % 7 + 1))
+            assert estimate_tokens(m.render()) <= budget
+
+def test_needs_rewrite():
+    assert needs_rewrite("and what about in children?")
+    assert needs_rewrite("is it contagious?")
+    assert not needs_rewrite("What are the symptoms of type 2 diabetes?")
+    assert needs_rewrite("during pregnancy?")
+    assert needs_rewrite("Does that mean I need antibiotics?")
+    assert needs_rewrite("How long do they last?")
+
+def test_standalone_questions_skip_rewrite():
+    assert not needs_rewrite("Is fever dangerous?")
+    assert not needs_rewrite("What is diabetes and how is it treated?")
+    assert not needs_rewrite("Can a headache make it hard to sleep?")
+    assert not needs_rewrite("Is it safe to take ibuprofen with a fever?")
+    assert not needs_rewrite("What does this rash on my arm mean?")
+    assert not needs_rewrite("If high blood pressure runs in my family, can I prevent it?")
+
+def test_rewrite_skips_llm_without_history():
+    def boom(history, query):
+        raise AssertionError("should not be called")
+
+    assert rewrite_query("and in children?", ConversationMemory(), rewrite=boom) == "and in children?"
+
+def test_rewrite_uses_history():
+    m = ConversationMemory(summarize=fake_summarize)
+    m.add_turn("user", "What is a normal temperature?")
+    m.add_turn("assistant", "About 98.6F.")
+    seen = {}
+    def rewrite(history, query):
+        seen["history"] = history
+        return '"What is a normal temperature in children?"\n'
+
+    assert rewrite_query("and in children?", m, rewrite=rewrite) == "What is a normal temperature in children?"
+    assert "User: What is a normal temperature?" in seen["history"]
@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from backend.embeddings import EMBEDDING_DIM, OnnxEmbedder
+
+class FakeTokenizer:
+    def encode_batch(self, texts):
+        # one token per word, padded to the longest text
+        longest = max(len(t.split()) for t in texts)
+        return [SimpleNamespace(ids=[i + 1 for i in range(len(t.split()))] + [0] * (longest - len(t.split())),
+                                attention_mask=[1] * len(t.split()) + [0] * (longest - len(t.split())))
+                for t in texts]
+
+class FakeSession:
+    """Hidden state of token i is [id, 1, 0, ...]; padding tokens get a huge value that pooling must ignore."""
+    def run(self, outputs, feeds):
+        ids, mask = feeds["input_ids"], feeds["attention_mask"]
+        hidden = np.zeros(ids.shape + (EMBEDDING_DIM,), dtype=np.float32)
+        hidden[..., 0] = np.where(mask == 1, ids, 1000.0)
+        hidden[..., 1] = 1.0
+        return [hidden]
+
+def _embedder():
+    e = OnnxEmbedder.__new__(OnnxEmbedder)
+    e.session, e.tokenizer, e.input_names = FakeSession(), FakeTokenizer(), {"input_ids", "attention_mask"}
+    return e
+
+def test_encode_shapes():
+    e = _embedder()
+    assert e.encode("fever").shape == (EMBEDDING_DIM,)
+    assert e.encode(["fever", "high blood pressure"]).shape == (2, EMBEDDING_DIM)
+    assert e.encode([]).shape == (0, EMBEDDING_DIM)
+    assert e.encode(["a b c"] * 5, batch_size=2).shape == (5, EMBEDDING_DIM)
+
+def test_mask_weighted_mean_pooling_and_normalization():
+    e = _embedder()
+    short, long_ = e.encode(["fever", "high blood pressure"])
+    # "fever" has one real token (id 1) and two padding tokens: mean = [1, 1], then normalized
+    assert np.allclose(short[:2], [1 / np.sqrt(2), 1 / np.sqrt(2)])
+    # ids 1, 2, 3 -> mean [2, 1]
+    assert np.allclose(long_[:2], np.array([2, 1]) / np.sqrt(5))
+    assert np.allclose(np.linalg.norm([short, long_], axis=1), 1.0)
@@ -0,0 +1,17 @@
+from backend.metrics import RequestMetrics, percentile
+
+def test_percentile():
+    values = [i / 100 for i in range(1, 101)]
+    assert percentile(values, 50) == 0.5
+    assert percentile(values, 99) == 0.99
+    assert percentile([], 50) == 0.0
+
+def test_snapshot_counts_status():
+    m = RequestMetrics(window=2)
+    m.record("/ask", 200, 0.1)
+    m.record("/ask", 429, 0.001)
+    m.record("/ask", 200, 0.3)
+    snap = m.snapshot()["/ask"]
+    assert snap["requests"] == 3
+    assert snap["status"] == {"200": 2, "429": 1}
+    assert snap["latency"]["max_ms"] == 300.0  # only the last 2 kept
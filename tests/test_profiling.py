@@ -0,0 +1,55 @@
+import json
+import os
+import time
+
+from backend import profiling
+from backend.profiling import RequestProfile, profile_request
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+def test_disabled_is_noop():
+    profiling.set_enabled(False)
+    profile = profile_request("q")
+    with profile.stage("retrieve"):
+        pass
+    assert profile.finish() is None
+
+def test_slow_request_writes_folded_profile(tmp_path):
+    profile = RequestProfile("What is fever?", threshold_ms=10, interval_ms=1, out_dir=str(tmp_path))
+    profile.cache_key, profile.cache_status = "ab" * 32, "miss"
+    with profile.stage("generate"):
+        _busy(0.05)
+    path = profile.finish()
+    assert os.path.basename(path).startswith("ab" * 8)
+    lines = open(path, encoding="utf-8").read().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any(line.startswith("stage:generate;") and "_busy" in line for line in lines)
+    meta = json.load(open(path[:-len(".folded")] + ".json", encoding="utf-8"))
+    assert meta["cache_status"] == "miss"
+    assert meta["stages_ms"]["generate"] >= 50
+
+def test_fast_request_writes_nothing(tmp_path):
+    profile = RequestProfile("q", threshold_ms=10000, out_dir=str(tmp_path))
+    assert profile.finish() is None
+    assert os.listdir(tmp_path) == []
+
+def test_finish_once_and_follow_consumer_thread(tmp_path):
+    import threading
+
+    profile = RequestProfile("q", threshold_ms=10, interval_ms=1, out_dir=str(tmp_path))
+
+    def consume():
+        profile.attach()
+        with profile.stage("generate"):
+            _busy(0.05)
+
+    worker = threading.Thread(target=consume)
+    worker.start()
+    worker.join()
+    path = profile.finish()
+    assert any("stage:generate;" in line and "_busy" in line for line in open(path, encoding="utf-8"))
+    assert profile.finish() is None
+    assert len(os.listdir(tmp_path)) == 2
@@ -0,0 +1,73 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from backend.sharding import ShardRouter, compute_centroids, shard_centroids
+
+class FakeCollection:
+    def __init__(self, hits):
+        self.hits = hits  # [(id, distance)]
+        self.calls = 0
+
+    def query(self, query_embeddings, n_results, where=None):
+        self.calls += 1
+        hits = self.hits[:n_results]
+        return {"ids": [[h[0] for h in hits]], "documents": [[f"doc {h[0]}" for h in hits]],
+                "metadatas": [[{"source": h[0]} for h in hits]], "distances": [[h[1] for h in hits]]}
+
+class FakeClient:
+    def __init__(self, shards):
+        self.shards = shards
+
+    def get_collection(self, name):
+        return self.shards[name]
+
+def _router(margin=0.05):
+    shards = {
+        "medical_kb_fever": FakeCollection([("f1", 0.1), ("f2", 0.4)]),
+        "medical_kb_cold": FakeCollection([("c1", 0.2), ("c2", 0.3)]),
+        "medical_kb_diabetes": FakeCollection([("d1", 0.05)]),
+    }
+    centroids = compute_centroids({"fever": [[1, 0, 0]], "cold": [[0.9, 0.3, 0]], "diabetes": [[0, 0, 1]]})
+    return ShardRouter(FakeClient(shards), centroids=centroids, max_shards=2, margin=margin), shards
+
+def test_route_picks_closest_topics():
+    router, _ = _router(margin=0.1)
+    assert router.route([1, 0, 0]) == ["fever", "cold"]
+    assert router.route([0, 0, 1]) == ["diabetes"]
+
+def test_query_merges_shards_by_distance():
+    router, shards = _router(margin=0.1)
+    res = router.query(query_embeddings=[[1, 0, 0]], n_results=3)
+    assert res["ids"][0] == ["f1", "c1", "c2"]
+    assert shards["medical_kb_diabetes"].calls == 0
+
+def test_topic_filter_selects_shard():
+    router, shards = _router()
+    res = router.query(query_embeddings=[[1, 0, 0]], n_results=3, where={"topic": "diabetes"})
+    assert res["ids"][0] == ["d1"]
+    assert shards["medical_kb_fever"].calls == 0
+
+def test_shard_centroids_cover_every_shard():
+    class StoredCollection:
+        def __init__(self, embeddings):
+            self.embeddings = embeddings
+
+        def count(self):
+            return len(self.embeddings)
+
+        def get(self, include, limit, offset):
+            return {"embeddings": self.embeddings[offset:offset + limit]}
+
+    class Client(FakeClient):
+        def list_collections(self):
+            return list(self.shards)
+
+    client = Client({"medical_kb": StoredCollection([[1, 0, 0]]),
+                     "medical_kb_fever": StoredCollection([[1, 0, 0], [0.8, 0.6, 0], [1, 0, 0]]),
+                     "medical_kb_diabetes": StoredCollection([[0, 0, 1]]),
+                     "medical_kb_empty": StoredCollection([])})
+    centroids = shard_centroids(client, page_size=2)
+    assert sorted(centroids) == ["diabetes", "fever"]
+    expected = compute_centroids({"fever": [[1, 0, 0], [0.8, 0.6, 0], [1, 0, 0]]})["fever"]
+    assert centroids["fever"] == pytest.approx(expected, abs=1e-6)
@@ -0,0 +1,64 @@
+import pytest
+
+from backend.stt import MicroBatcher, get_stt_backend
+
+def test_batcher_groups_concurrent_requests():
+    seen = []
+    def batch_fn(items):
+        seen.append(list(items))
+        return [i * 10 for i in items]
+
+    b = MicroBatcher(batch_fn, max_batch=4, max_wait_ms=200)
+    futures = [b.submit(i) for i in range(4)]
+    assert [f.result(timeout=2) for f in futures] == [0, 10, 20, 30]
+    assert seen == [[0, 1, 2, 3]]
+
+def test_batcher_propagates_errors():
+    def batch_fn(items):
+        raise RuntimeError("boom")
+
+    b = MicroBatcher(batch_fn, max_batch=2, max_wait_ms=10)
+    with pytest.raises(RuntimeError):
+        b(1)
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        get_stt_backend("nope")
+
+def test_batcher_fails_single_item():
+    b = MicroBatcher(lambda items: [ValueError("bad") if i < 0 else i for i in items], max_batch=2, max_wait_ms=200)
+    bad, good = b.submit(-1), b.submit(1)
+    assert good.result(timeout=2) == 1
+    with pytest.raises(ValueError):
+        bad.result(timeout=2)
+
+def test_load_wav_rejects_non_16bit(tmp_path):
+    pytest.importorskip("numpy")
+    import wave
+    from backend.stt import TranscriptionError, load_wav
+
+    path = str(tmp_path / "8bit.wav")
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(1)
+        wf.setframerate(16000)
+        wf.writeframes(b"\x80" * 160)
+    with pytest.raises(TranscriptionError):
+        load_wav(path)
+    (tmp_path / "junk.wav").write_bytes(b"not a wav")
+    with pytest.raises(TranscriptionError):
+        load_wav(str(tmp_path / "junk.wav"))
+
+def test_local_batch_matches_single_on_silence():
+    from backend.stt import LocalWhisperSTT, TranscriptionError
+
+    class Fake(LocalWhisperSTT):
+        def _run_batch(self, audio_paths):
+            return ["hello" if p == "speech.wav" else "" for p in audio_paths]
+
+    stt = Fake()
+    assert stt.transcribe_batch(["speech.wav"]) == ["hello"]
+    with pytest.raises(TranscriptionError):
+        stt.transcribe("silence.wav")
+    with pytest.raises(TranscriptionError):
+        stt.transcribe_batch(["speech.wav", "silence.wav"])
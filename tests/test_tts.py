@@ -0,0 +1,73 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.cache_singleton import audio_cache
+from backend.tts import SentenceSplitter, SpeechSession, audio_key, split_sentences
+
+def test_split_sentences_keeps_abbreviations():
+    text = "See Dr. Smith if the fever lasts. Drink plenty of fluids! Rest"
+    assert split_sentences(text) == ["See Dr. Smith if the fever lasts.", "Drink plenty of fluids!", "Rest"]
+
+def test_no_is_only_an_abbreviation_before_a_number():
+    assert split_sentences("For a cold, the answer is no. You should rest at home today.") == \
+        ["For a cold, the answer is no.", "You should rest at home today."]
+    assert split_sentences("Take tablet No. 5 twice a day with food.") == ["Take tablet No. 5 twice a day with food."]
+    s = SentenceSplitter()
+    assert s.feed("Take the dose listed as No. ") == []  # a number may follow
+    assert s.feed("5 on the label. Then rest") == ["Take the dose listed as No. 5 on the label."]
+
+def test_splitter_across_deltas():
+    s = SentenceSplitter()
+    assert s.feed("Headaches are very com") == []
+    assert s.feed("mon in adults. Most are") == ["Headaches are very common in adults."]
+    assert s.flush() == ["Most are"]
+
+def test_session_plays_in_order_and_caches():
+    audio_cache.clear()
+
+    def synthesize(text):
+        time.sleep(random.uniform(0, 0.05))  # finish out of order
+        return text.encode()
+
+    played = []
+    deltas = ["First sentence is here. ", "Second sentence is here. ", "Third sentence is here."]
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        speech = SpeechSession(synthesize=synthesize, play=played.append, executor=pool)
+        assert list(speech.wrap(deltas)) == deltas
+
+        assert [p.decode() for p in played] == [d.strip() for d in deltas]
+        assert speech.first_audio_s is not None
+        answer = "".join(deltas)
+        assert audio_cache.get(audio_key(answer)) == played
+
+        replay = []
+        again = SpeechSession(answer=answer, synthesize=None, play=replay.append, executor=pool)
+        list(again.wrap([answer]))
+        assert again.from_cache and replay == played
+
+def test_session_never_plays_another_answers_audio():
+    audio_cache.clear()
+    old = "The old answer was generated first. It has since been evicted."
+    audio_cache.set(audio_key(old), [b"old audio"])
+
+    played = []
+    new = "The regenerated answer says something else entirely."
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        speech = SpeechSession(answer=new, synthesize=str.encode, play=played.append, executor=pool)
+        list(speech.wrap([new]))
+    assert not speech.from_cache
+    assert played == [new.encode()]
+    assert audio_cache.get(audio_key(new)) == played
+
+def test_session_exposes_synthesis_error():
+    audio_cache.clear()
+
+    def synthesize(text):
+        raise RuntimeError("no speech engine")
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        speech = SpeechSession(synthesize=synthesize, play=lambda clip: None, executor=pool)
+        list(speech.wrap(["This sentence cannot be spoken."]))
+    assert isinstance(speech.error, RuntimeError)
+    assert audio_cache.info()[0] == 0
@@ -0,0 +1,93 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from backend.vector_store import CompactVectorStore
+
+def _data(n=2000, dim=64, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(20, dim))
+    x = centers[rng.integers(0, 20, n)] + 0.5 * rng.normal(size=(n, dim))
+    return (x / np.linalg.norm(x, axis=1, keepdims=True)).astype(np.float32)
+
+@pytest.mark.parametrize("quantization,binary", [("int8", False), ("int8", True), ("float16", True)])
+def test_search_matches_exact(tmp_path, quantization, binary):
+    x = _data()
+    ids = [f"id{i}" for i in range(len(x))]
+    CompactVectorStore.build(str(tmp_path), ids, x, [f"doc {i}" for i in range(len(x))],
+                             [{"source": f"s{i}"} for i in range(len(x))], quantization=quantization, binary=binary)
+    store = CompactVectorStore(str(tmp_path))
+
+    hits = 0
+    for q in x[:20]:
+        rows, distances = store.search(q, k=5)
+        exact = np.argsort(-(x @ q))[:5]
+        hits += len(set(rows) & set(exact))
+        assert np.all(np.diff(distances) >= -1e-6)
+    assert hits / 100 >= 0.95
+
+def test_query_is_chroma_compatible(tmp_path):
+    x = _data(n=50)
+    CompactVectorStore.build(str(tmp_path), [f"id{i}" for i in range(50)], x, [f"doc {i}" for i in range(50)],
+                             [{"source": f"s{i}"} for i in range(50)])
+    res = CompactVectorStore(str(tmp_path)).query(query_embeddings=[x[7].tolist()], n_results=3)
+    assert res["ids"][0][0] == "id7"
+    assert res["documents"][0][0] == "doc 7"
+    assert res["metadatas"][0][0] == {"source": "s7"}
+    assert res["distances"][0][0] == pytest.approx(0.0, abs=1e-5)
+
+def test_query_where_filter(tmp_path):
+    x = _data(n=200)
+    metas = [{"topic": "fever" if i % 2 else "cold"} for i in range(200)]
+    CompactVectorStore.build(str(tmp_path), [f"id{i}" for i in range(200)], x, [""] * 200, metas)
+    store = CompactVectorStore(str(tmp_path))
+    res = store.query(query_embeddings=[x[4].tolist()], n_results=5, where={"topic": "fever"})
+    assert len(res["ids"][0]) == 5
+    assert all(m["topic"] == "fever" for m in res["metadatas"][0])
+    res = store.query(query_embeddings=[x[4].tolist()], n_results=3, where={"topic": {"$in": ["cold"]}})
+    assert res["ids"][0][0] == "id4"
+
+def test_build_rejects_empty_collection(tmp_path):
+    with pytest.raises(ValueError):
+        CompactVectorStore.build(str(tmp_path / "index"), [], [], [], [])
+    assert not (tmp_path / "index").exists()
+
+def test_rebuild_is_picked_up(tmp_path, monkeypatch):
+    import backend.vector_store as vector_store
+
+    index_dir = str(tmp_path / "index")
+    x = _data(n=50)
+    CompactVectorStore.build(index_dir, [f"id{i}" for i in range(50)], x, [f"doc {i}" for i in range(50)],
+                             [{} for _ in range(50)])
+    store = CompactVectorStore(index_dir)
+    monkeypatch.setattr(vector_store, "RELOAD_CHECK_S", 0.0)
+    assert not store.changed_on_disk()
+
+    y = _data(n=80, seed=1)
+    CompactVectorStore.build(index_dir, [f"new{i}" for i in range(80)], y, [f"new {i}" for i in range(80)],
+                             [{} for _ in range(80)])
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["index"]
+    assert store.changed_on_disk()
+    fresh = store.reopen()
+    assert len(fresh) == 80
+    assert fresh.query(query_embeddings=[y[3].tolist()], n_results=1)["ids"][0] == ["new3"]
+
+def test_build_from_pages_matches_build(tmp_path):
+    x = _data(n=300)
+    ids, docs, metas = [f"id{i}" for i in range(300)], [f"doc {i}" for i in range(300)], [{"n": i} for i in range(300)]
+    CompactVectorStore.build(str(tmp_path / "whole"), ids, x, docs, metas)
+    pages = ((ids[i:i + 64], x[i:i + 64], docs[i:i + 64], metas[i:i + 64]) for i in range(0, 300, 64))
+    CompactVectorStore.build_from_pages(str(tmp_path / "paged"), pages, count=300, dim=x.shape[1])
+
+    for name in ("vectors_f32.npy", "codes_int8.npy", "scales.npy", "codes_bits.npy", "offsets.npy"):
+        assert np.array_equal(np.load(tmp_path / "whole" / name), np.load(tmp_path / "paged" / name))
+    assert (tmp_path / "whole" / "documents.jsonl").read_bytes() == (tmp_path / "paged" / "documents.jsonl").read_bytes()
+    res = CompactVectorStore(str(tmp_path / "paged")).query(query_embeddings=[x[200].tolist()], n_results=1)
+    assert res["ids"][0] == ["id200"] and res["metadatas"][0] == [{"n": 200}]
+
+def test_build_from_pages_rejects_wrong_count(tmp_path):
+    x = _data(n=10)
+    with pytest.raises(ValueError):
+        CompactVectorStore.build_from_pages(str(tmp_path / "index"), [([f"id{i}" for i in range(10)], x,
+                                            ["d"] * 10, [{}] * 10)], count=12, dim=x.shape[1])
+    assert not (tmp_path / "index").exists()